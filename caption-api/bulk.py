@@ -0,0 +1,85 @@
+"""Bulk offline captioning of a photo archive, written as NDJSON (one JSON object per line).
+
+    python bulk.py photos/ --output captions.ndjson
+    python bulk.py manifest.txt --output captions.ndjson --resume
+
+The input is a directory (searched recursively) or a manifest with one path per line
+(or JSON lines with a "path" field). Images are decoded in a process pool that prefetches
+ahead of the model, and captions are generated in batches with greedy_caption_batch.
+With --resume, paths already present in the output are skipped, so an interrupted run
+continues where it stopped.
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+from typing import Any, Dict, List, Tuple
+
+from uploads import decode_downscaled, open_image_checked
+from vision_common.bulk import add_bulk_arguments, pending_paths, run_bulk
+
+# NOTE: TensorFlow/modeling are imported inside main(): decode workers are spawned
+# processes that re-import this module and must stay lightweight.
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("caption_bulk")
+
+ARTIFACTS_DIR = os.environ.get("CAPTIONING_ARTIFACTS_DIR", "captioning-model")
+
+
+def _decode_worker(path: str, min_size: Tuple[int, int], max_bytes: int, max_pixels: int) -> Dict[str, Any]:
+    try:
+        if os.path.getsize(path) > max_bytes:
+            return {"path": path, "error": f"Arquivo excede o limite de {max_bytes} bytes"}
+        with open(path, "rb") as f:
+            data = f.read()
+        img = open_image_checked(data, max_pixels)
+        return {
+            "path": path,
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "image": decode_downscaled(img, min_size),
+        }
+    except Exception as e:
+        # HTTPException from the upload helpers carries the message in .detail
+        return {"path": path, "error": str(getattr(e, "detail", e))}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Gera captions em lote (NDJSON) para um diretório ou manifesto")
+    add_bulk_arguments(parser, "CAPTIONING")
+    parser.add_argument("--weights", default=os.environ.get("CAPTIONING_WEIGHTS_PATH", os.path.join(ARTIFACTS_DIR, "caption_model.weights.h5")))
+    parser.add_argument("--vocab", default=os.environ.get("CAPTIONING_VOCAB_PATH", os.path.join(ARTIFACTS_DIR, "vocab.json")))
+    parser.add_argument("--metadata", default=os.environ.get("CAPTIONING_METADATA_PATH", os.path.join(ARTIFACTS_DIR, "metadata.json")))
+    args = parser.parse_args()
+
+    import numpy as np
+
+    from modeling import build_and_load_captioning_from_files, greedy_caption_batch, preprocess_image_array
+
+    todo = pending_paths(args, logger)
+    if not todo:
+        return
+
+    artifacts = build_and_load_captioning_from_files(
+        weights_path=args.weights,
+        vocab_path=args.vocab,
+        metadata_path=args.metadata,
+    )
+
+    def caption_batch(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        images = np.stack([preprocess_image_array(item["image"], artifacts.image_size) for item in items])
+        return [{"caption": c} for c in greedy_caption_batch(image_arrays=images, artifacts=artifacts)]
+
+    run_bulk(
+        todo,
+        args,
+        worker=_decode_worker,
+        worker_kwargs={"min_size": artifacts.image_size},
+        infer=caption_batch,
+        logger=logger,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,36 @@
-import json
 import os
 import logging
 import hashlib
-from typing import Optional, Dict
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, Query
+import numpy as np
+from fastapi import FastAPI, Request, UploadFile, File, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 
 import tensorflow as tf
 import keras
 
 from modeling import (
-    build_and_load_captioning,
-    preprocess_image_bytes,
+    build_and_load_captioning_from_files,
+    preprocess_image_array,
     greedy_caption,
 )
+from vision_common.health import HealthMonitor
+from vision_common.profiling import Profiler, admin_router, TensorFlowTraceBackend
+from vision_common.singleflight import SingleFlight
+from translation import TranslationCache, build_translation_cache
+from uploads import (
+    PRESIZED_IMAGE_CONTENT_TYPES,
+    RAW_CONTENT_TYPES,
+    RequestSizeLimitMiddleware,
+    decode_downscaled,
+    decode_presized,
+    open_image_checked,
+    read_body_limited,
+    read_upload_limited,
+)
 
 
 logging.basicConfig(level=logging.INFO)
@@ -29,6 +45,26 @@ WEIGHTS_PATH = os.environ.get(
 VOCAB_PATH = os.environ.get("CAPTIONING_VOCAB_PATH", os.path.join(ARTIFACTS_DIR, "vocab.json"))
 METADATA_PATH = os.environ.get("CAPTIONING_METADATA_PATH", os.path.join(ARTIFACTS_DIR, "metadata.json"))
 
+# Optional server-side pt-BR translation of captions (saves the app a round trip to Google Translate).
+TRANSLATION_API_KEY = os.environ.get("CAPTIONING_TRANSLATION_API_KEY")
+TRANSLATION_URL = os.environ.get("CAPTIONING_TRANSLATION_URL")
+TRANSLATION_CACHE_SIZE = int(os.environ.get("CAPTIONING_TRANSLATION_CACHE_SIZE", "1024"))
+SUPPORTED_LANGS = ("pt", "pt-BR")
+
+# Readiness: only report ready after N warm-up captions (first inference pays lazy-init costs).
+WARMUP_RUNS = int(os.environ.get("CAPTIONING_WARMUP_RUNS", "2"))
+HEALTH_REFRESH_SECONDS = float(os.environ.get("CAPTIONING_HEALTH_REFRESH_SECONDS", "5"))
+
+# Upload guardrails (bytes of the encoded file and pixel count read from the image header).
+MAX_UPLOAD_BYTES = int(os.environ.get("CAPTIONING_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+MAX_IMAGE_PIXELS = int(os.environ.get("CAPTIONING_MAX_IMAGE_PIXELS", "40000000"))
+# Room for the multipart envelope on top of the file itself.
+MAX_REQUEST_BYTES = MAX_UPLOAD_BYTES + 64 * 1024
+
+# On-demand profiling (/admin/profile); disabled unless a token is configured.
+ADMIN_TOKEN = os.environ.get("CAPTIONING_ADMIN_TOKEN")
+PROFILE_MAX_SECONDS = float(os.environ.get("CAPTIONING_PROFILE_MAX_SECONDS", "300"))
+
 app = FastAPI(title="Captioning API", version="1.0.0")
 
 app.add_middleware(
@@ -39,13 +75,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Caps every request body (declared or chunked) before the multipart/JSON parsers read it.
+app.add_middleware(RequestSizeLimitMiddleware, max_bytes=MAX_REQUEST_BYTES)
+
+
 artifacts = None
 artifacts_sha256: Optional[Dict[str, str]] = None
+translation_cache: Optional[TranslationCache] = None
+inflight = SingleFlight()
+profiler = Profiler(TensorFlowTraceBackend())
 
 
-def _load_json(path: str):
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
 
 def _file_sha256(path: str) -> str:
     h = hashlib.sha256()
@@ -55,9 +95,8 @@ def _file_sha256(path: str) -> str:
     return h.hexdigest()
 
 
-@app.on_event("startup")
-async def startup_event():
-    global artifacts, artifacts_sha256
+def _load() -> None:
+    global artifacts, artifacts_sha256, translation_cache
 
     # Run on CPU (stable and predictable for Docker)
     try:
@@ -77,21 +116,10 @@ async def startup_event():
                 f"Treine e exporte pelo notebook para {ARTIFACTS_DIR}/."
             )
 
-    vocab = _load_json(VOCAB_PATH)
-    metadata = _load_json(METADATA_PATH)
-
-    image_size = tuple(metadata["image_size"])
-    artifacts = build_and_load_captioning(
+    loaded = build_and_load_captioning_from_files(
         weights_path=WEIGHTS_PATH,
-        vocab=vocab,
-        image_size=image_size,
-        seq_length=int(metadata["seq_length"]),
-        vocab_size=int(metadata["vocab_size"]),
-        embed_dim=int(metadata["embed_dim"]),
-        ff_dim=int(metadata["ff_dim"]),
-        encoder_num_heads=int(metadata.get("encoder_num_heads", 2)),
-        decoder_num_heads=int(metadata.get("decoder_num_heads", 3)),
-        strip_chars=str(metadata.get("strip_chars", "!\"#$%&'()*+,-./:;=?@[\\]^_`{|}~1234567890")),
+        vocab_path=VOCAB_PATH,
+        metadata_path=METADATA_PATH,
     )
 
     # Hashes to ensure that the container is using the same artifacts as the notebook.
@@ -108,27 +136,41 @@ async def startup_event():
         artifacts_sha256["vocab"],
         artifacts_sha256["metadata"],
     )
+    translation_cache = build_translation_cache(
+        api_key=TRANSLATION_API_KEY,
+        url=TRANSLATION_URL,
+        maxsize=TRANSLATION_CACHE_SIZE,
+    )
+    logger.info("Tradução pt-BR no servidor: %s", "ativa" if translation_cache else "desativada")
+
     # Sanity checks useful to detect vocabulary/token id mismatch.
     try:
-        v = artifacts.vectorizer.get_vocabulary()
-        start_id = int(artifacts.vectorizer(["<start>"]).numpy()[0][0])
-        end_id = int(artifacts.vectorizer(["<end>"]).numpy()[0][0])
+        v = loaded.vectorizer.get_vocabulary()
+        start_id = int(loaded.vectorizer(["<start>"]).numpy()[0][0])
+        end_id = int(loaded.vectorizer(["<end>"]).numpy()[0][0])
         logger.info("Vectorizer vocab head: %s", v[:8])
         logger.info("Token ids: <start>=%s <end>=%s", start_id, end_id)
     except Exception as e:
         logger.warning("Falha no sanity-check do vectorizer: %s", e)
 
+    # Published last: handlers answer 503 until everything above is in place.
+    artifacts = loaded
 
-@app.get("/")
-async def root():
-    return {"message": "Captioning API está funcionando!", "status": "online"}
 
+def _warm_up() -> None:
+    assert artifacts is not None
+    t0 = time.time()
+    # Same shape as real requests (the decoder always sees [1, seq_length - 1]).
+    dummy = np.zeros((*artifacts.image_size, 3), dtype=np.float32)
+    for _ in range(WARMUP_RUNS):
+        greedy_caption(image_array=dummy, artifacts=artifacts)
+    logger.info("Warm-up concluído: %d execuções em %.0f ms", WARMUP_RUNS, (time.time() - t0) * 1000.0)
 
-@app.get("/health")
-async def health():
-    ok = artifacts is not None
+
+def _build_health_snapshot() -> Dict[str, Any]:
     return {
-        "status": "ok" if ok else "starting",
+        "model_loaded": artifacts is not None,
+        "warmup_runs": WARMUP_RUNS,
         "artifacts_dir": ARTIFACTS_DIR,
         "weights_path": WEIGHTS_PATH,
         "vocab_path": VOCAB_PATH,
@@ -139,17 +181,141 @@ async def health():
             "keras": getattr(keras, "__version__", None),
             "TF_ENABLE_ONEDNN_OPTS": os.environ.get("TF_ENABLE_ONEDNN_OPTS"),
         },
+        "translation": translation_cache.stats() if translation_cache else None,
+        "inflight": inflight.stats(),
+    }
+
+
+health_monitor = HealthMonitor(
+    load=_load,
+    warm_up=_warm_up,
+    build_snapshot=_build_health_snapshot,
+    refresh_seconds=HEALTH_REFRESH_SECONDS,
+)
+
+
+@app.on_event("startup")
+async def startup_event():
+    # Loading and warm-up run in the background so liveness probes answer while they happen.
+    health_monitor.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    health_monitor.stop()
+    profiler.stop(reason="shutdown")
+
+
+@app.get("/")
+async def root():
+    return {"message": "Captioning API está funcionando!", "status": "online"}
+
+
+@app.get("/health")
+async def health():
+    # Served from the background snapshot: never loads or runs anything in the probe.
+    return health_monitor.snapshot
+
+
+@app.get("/health/live")
+async def health_live():
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def health_ready():
+    return health_monitor.ready_response()
+
+
+async def _translate_caption(caption: str) -> Optional[str]:
+    # None tells the client to fall back to its own translation.
+    if translation_cache is None or not caption:
+        return None
+    return await run_in_threadpool(translation_cache.translate_or_none, caption)
+
+
+@app.get("/capabilities")
+async def capabilities():
+    # Lets clients resize/encode on device so the server skips decode and resize entirely.
+    if artifacts is None:
+        raise HTTPException(status_code=503, detail="Modelo ainda não carregou.")
+    height, width = artifacts.image_size
+    return {
+        "input": {
+            "width": int(width),
+            "height": int(height),
+            "channels": 3,
+            "dtype": "uint8",
+            "layout": "HWC",
+            "color": "RGB",
+            "resize": "stretch",
+        },
+        "endpoints": {
+            "/caption": {"encodings": ["multipart/form-data"], "any_size": True},
+            "/caption/raw": {
+                "encodings": list(RAW_CONTENT_TYPES + PRESIZED_IMAGE_CONTENT_TYPES),
+                "headers": ["X-Image-Width", "X-Image-Height"],
+                "any_size": False,
+            },
+        },
+        "limits": {"max_upload_bytes": MAX_UPLOAD_BYTES, "max_image_pixels": MAX_IMAGE_PIXELS},
+        "languages": list(SUPPORTED_LANGS),
     }
 
 
+async def _caption_response(
+    decode: Callable[[], np.ndarray],
+    *,
+    coalesce_key: Hashable,
+    file_sha256: str,
+    nbytes: int,
+    debug: bool,
+    lang: Optional[str],
+) -> Dict[str, Any]:
+    def _run() -> Tuple[str, np.ndarray]:
+        image_arr = decode()
+        with profiler.trace():
+            return greedy_caption(image_array=image_arr, artifacts=artifacts), image_arr
+
+    # Off the event loop, and shared by identical requests already in flight (app retries).
+    try:
+        caption, image_arr = await inflight.do(coalesce_key, lambda: run_in_threadpool(_run))
+    finally:
+        # Once per request, also for duplicates served by a shared caption.
+        profiler.request_finished()
+    resp: Dict[str, Any] = {"success": True, "caption": caption}
+    if lang is not None:
+        resp["caption_pt"] = await _translate_caption(caption)
+    if debug:
+        resp.update(
+            {
+                "debug": {
+                    "sha256": file_sha256,
+                    "bytes": nbytes,
+                    "image_mean": float(image_arr.mean()),
+                    "image_std": float(image_arr.std()),
+                    "image_min": float(image_arr.min()),
+                    "image_max": float(image_arr.max()),
+                }
+            }
+        )
+    return resp
+
+
 @app.post("/caption")
-async def caption_image(file: UploadFile = File(...), debug: bool = Query(False)):
+async def caption_image(
+    file: UploadFile = File(...),
+    debug: bool = Query(False),
+    lang: Optional[str] = Query(None),
+):
     global artifacts
     if artifacts is None:
         raise HTTPException(status_code=503, detail="Modelo ainda não carregou.")
+    if lang is not None and lang not in SUPPORTED_LANGS:
+        raise HTTPException(status_code=400, detail=f"Idioma não suportado: {lang}")
 
     try:
-        image_bytes = await file.read()
+        image_bytes = await read_upload_limited(file, MAX_UPLOAD_BYTES)
         file_sha256 = hashlib.sha256(image_bytes).hexdigest()
         logger.info(
             "POST /caption file=%s content_type=%s size=%d sha256=%s",
@@ -159,25 +325,72 @@ async def caption_image(file: UploadFile = File(...), debug: bool = Query(False)
             file_sha256,
         )
 
-        image_arr = preprocess_image_bytes(image_bytes, artifacts.image_size)
-        caption = greedy_caption(image_array=image_arr, artifacts=artifacts)
-        resp = {"success": True, "caption": caption}
-        if debug:
-            resp.update(
-                {
-                    "debug": {
-                        "sha256": file_sha256,
-                        "bytes": len(image_bytes),
-                        "image_mean": float(image_arr.mean()),
-                        "image_std": float(image_arr.std()),
-                        "image_min": float(image_arr.min()),
-                        "image_max": float(image_arr.max()),
-                    }
-                }
-            )
-        return resp
+        def _decode() -> np.ndarray:
+            img = open_image_checked(image_bytes, MAX_IMAGE_PIXELS)
+            return preprocess_image_array(decode_downscaled(img, artifacts.image_size), artifacts.image_size)
+
+        return await _caption_response(
+            _decode,
+            coalesce_key=("file", file_sha256),
+            file_sha256=file_sha256,
+            nbytes=len(image_bytes),
+            debug=debug,
+            lang=lang,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Erro ao gerar caption: %s", e)
+        raise HTTPException(status_code=500, detail=f"Erro ao gerar caption: {str(e)}")
+
+
+@app.post("/caption/raw")
+async def caption_raw(
+    request: Request,
+    width: int = Header(..., alias="X-Image-Width"),
+    height: int = Header(..., alias="X-Image-Height"),
+    debug: bool = Query(False),
+    lang: Optional[str] = Query(None),
+):
+    """Pre-sized input: raw RGB uint8 buffer (or a JPEG) at exactly the size from /capabilities."""
+    if artifacts is None:
+        raise HTTPException(status_code=503, detail="Modelo ainda não carregou.")
+    if lang is not None and lang not in SUPPORTED_LANGS:
+        raise HTTPException(status_code=400, detail=f"Idioma não suportado: {lang}")
+    expected_h, expected_w = artifacts.image_size
+    if (height, width) != (expected_h, expected_w):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Dimensões {width}x{height} inválidas; esperado {expected_w}x{expected_h} (veja /capabilities)",
+        )
+
+    try:
+        data = await read_body_limited(request, MAX_UPLOAD_BYTES)
+        file_sha256 = hashlib.sha256(data).hexdigest()
+        content_type = request.headers.get("content-type")
+        logger.info(
+            "POST /caption/raw content_type=%s size=%d sha256=%s",
+            content_type,
+            len(data),
+            file_sha256,
+        )
+
+        def _decode() -> np.ndarray:
+            return preprocess_image_array(decode_presized(data, content_type, width, height), artifacts.image_size)
+
+        return await _caption_response(
+            _decode,
+            coalesce_key=("raw", file_sha256, content_type, width, height),
+            file_sha256=file_sha256,
+            nbytes=len(data),
+            debug=debug,
+            lang=lang,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("Erro ao gerar caption: %s", e)
         raise HTTPException(status_code=500, detail=f"Erro ao gerar caption: {str(e)}")
 
 
+app.include_router(admin_router(profiler, ADMIN_TOKEN, PROFILE_MAX_SECONDS))
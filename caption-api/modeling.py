@@ -1,3 +1,4 @@
+import json
 import re
 from dataclasses import dataclass
 from typing import Dict, List, Tuple
@@ -280,14 +281,50 @@ def build_and_load_captioning(
     )
 
 
-def preprocess_image_bytes(image_bytes: bytes, image_size: Tuple[int, int]) -> np.ndarray:
-    # Same as in the notebook (TensorFlow): decode -> resize -> convert_image_dtype(float32 in [0,1])
-    img = tf.io.decode_image(image_bytes, channels=3, expand_animations=False)
-    img = tf.image.resize(img, image_size)
+def build_and_load_captioning_from_files(
+    *,
+    weights_path: str,
+    vocab_path: str,
+    metadata_path: str,
+) -> CaptioningArtifacts:
+    # Artifacts exported by the notebook: weights + vocab.json + metadata.json
+    with open(vocab_path, "r", encoding="utf-8") as f:
+        vocab = json.load(f)
+    with open(metadata_path, "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+
+    return build_and_load_captioning(
+        weights_path=weights_path,
+        vocab=vocab,
+        image_size=tuple(metadata["image_size"]),
+        seq_length=int(metadata["seq_length"]),
+        vocab_size=int(metadata["vocab_size"]),
+        embed_dim=int(metadata["embed_dim"]),
+        ff_dim=int(metadata["ff_dim"]),
+        encoder_num_heads=int(metadata.get("encoder_num_heads", 2)),
+        decoder_num_heads=int(metadata.get("decoder_num_heads", 3)),
+        strip_chars=str(metadata.get("strip_chars", "!\"#$%&'()*+,-./:;=?@[\\]^_`{|}~1234567890")),
+    )
+
+
+def preprocess_image_array(image: np.ndarray, image_size: Tuple[int, int]) -> np.ndarray:
+    # Same as in the notebook (TensorFlow) after decoding: resize -> convert_image_dtype(float32)
+    if tuple(image.shape[:2]) == tuple(image_size):
+        # Already at the model size (pre-sized input): resize would be the identity.
+        return np.asarray(image, dtype=np.float32)
+    img = tf.image.resize(image, image_size)
     img = tf.image.convert_image_dtype(img, tf.float32)
     return img.numpy()
 
 
+def preprocess_image_bytes(image_bytes: bytes, image_size: Tuple[int, int]) -> np.ndarray:
+    # Same as in the notebook (TensorFlow): decode -> resize -> convert_image_dtype(float32).
+    # The API decodes with uploads.decode_downscaled instead; this stays as the reference
+    # for tests/test_preprocess_parity.py.
+    img = tf.io.decode_image(image_bytes, channels=3, expand_animations=False)
+    return preprocess_image_array(img, image_size)
+
+
 def greedy_caption(
     *,
     image_array: np.ndarray,
@@ -319,6 +356,49 @@ def greedy_caption(
         # of whitespace tokenization, and avoids divergence in the loop.)
         decoded_caption += " " + sampled_token
 
+    return _format_caption(decoded_caption)
+
+
+def greedy_caption_batch(
+    *,
+    image_arrays: np.ndarray,
+    artifacts: CaptioningArtifacts,
+) -> List[str]:
+    # Same decoding as greedy_caption, for a batch [N, H, W, 3]: one CNN/encoder pass and
+    # one decoder call per step for all images. Finished rows stay in the batch (fixed shape).
+    model = artifacts.model
+    vectorizer = artifacts.vectorizer
+    index_to_word = artifacts.index_to_word
+    max_decoded_sentence_length = artifacts.seq_length - 1
+
+    images = tf.convert_to_tensor(image_arrays, dtype=tf.float32)
+    encoded_img = model.encoder(model.cnn_model(images), training=False)
+
+    n = int(images.shape[0])
+    decoded_captions = ["<start> "] * n
+    finished = [False] * n
+    for i in range(max_decoded_sentence_length):
+        tokenized_captions = vectorizer(decoded_captions)[:, :-1]
+        mask = tf.math.not_equal(tokenized_captions, 0)
+        predictions = model.decoder(
+            tokenized_captions, encoded_img, training=False, mask=mask
+        )
+        sampled_token_indexes = tf.argmax(predictions[:, i, :], axis=-1).numpy()
+        for row in range(n):
+            if finished[row]:
+                continue
+            sampled_token = index_to_word.get(int(sampled_token_indexes[row]), "")
+            if sampled_token == "<end>":
+                finished[row] = True
+                continue
+            decoded_captions[row] += " " + sampled_token
+        if all(finished):
+            break
+
+    return [_format_caption(c) for c in decoded_captions]
+
+
+def _format_caption(decoded_caption: str) -> str:
     # Align with the notebook (final formatting)
     decoded_caption = decoded_caption.replace("<start> ", "")
     decoded_caption = decoded_caption.replace(" <end>", "").strip()
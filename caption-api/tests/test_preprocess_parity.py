@@ -0,0 +1,82 @@
+"""The API decodes with decode_downscaled (PIL, shrunk early) instead of the notebook's
+tf.io.decode_image; preprocess_image_bytes is kept as the notebook reference to compare against.
+"""
+
+import io
+import os
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFilter
+
+pytest.importorskip("tensorflow")
+
+from modeling import (  # noqa: E402
+    build_and_load_captioning_from_files,
+    greedy_caption,
+    preprocess_image_array,
+    preprocess_image_bytes,
+)
+from uploads import decode_downscaled, open_image_checked  # noqa: E402
+
+# Mean absolute difference allowed per pixel, in the 0-255 range the model receives. Early
+# downscaling averages pixels that a single full-resolution bilinear resize skips, so noisy
+# large photos differ by ~2-3 levels on average; images that need no shrinking match exactly.
+MAX_MEAN_ABS_DIFF = 4.0
+
+ARTIFACTS_DIR = os.environ.get("CAPTIONING_ARTIFACTS_DIR", "captioning-model")
+
+SAMPLES = [
+    (4000, 3000, "JPEG"),
+    (1200, 1600, "JPEG"),
+    (1024, 768, "PNG"),
+    (640, 480, "JPEG"),
+    (300, 300, "PNG"),
+]
+
+
+def _sample_bytes(width, height, fmt):
+    # Gradient, blurred shapes and sensor-like noise: a worst case for aliasing.
+    rng = np.random.default_rng(width + height)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([x / width * 255, y / height * 255, (x + y) / (width + height) * 255], -1)
+    img = Image.fromarray(base.astype(np.uint8))
+    draw = ImageDraw.Draw(img)
+    for _ in range(40):
+        cx, cy = rng.integers(0, width), rng.integers(0, height)
+        r = int(rng.integers(min(width, height) // 40, min(width, height) // 6))
+        draw.ellipse([cx - r, cy - r, cx + r, cy + r], fill=tuple(int(c) for c in rng.integers(0, 256, 3)))
+    arr = np.asarray(img.filter(ImageFilter.GaussianBlur(2))).astype(np.int16)
+    arr += rng.integers(-8, 9, arr.shape, dtype=np.int16)
+    buf = io.BytesIO()
+    Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8)).save(buf, fmt, quality=90)
+    return buf.getvalue()
+
+
+def _api_preprocess(data, image_size):
+    return preprocess_image_array(decode_downscaled(open_image_checked(data, 10**9), image_size), image_size)
+
+
+@pytest.mark.parametrize("width,height,fmt", SAMPLES)
+@pytest.mark.parametrize("image_size", [(299, 299), (224, 224)])
+def test_downscaled_decode_matches_notebook_preprocessing(width, height, fmt, image_size):
+    data = _sample_bytes(width, height, fmt)
+
+    expected = preprocess_image_bytes(data, image_size)
+    actual = _api_preprocess(data, image_size)
+
+    assert actual.shape == expected.shape == (*image_size, 3)
+    assert float(np.abs(actual - expected).mean()) <= MAX_MEAN_ABS_DIFF
+
+
+def test_downscaled_decode_keeps_captions():
+    paths = [os.path.join(ARTIFACTS_DIR, name) for name in ("caption_model.weights.h5", "vocab.json", "metadata.json")]
+    if not all(os.path.exists(p) for p in paths):
+        pytest.skip(f"Artefatos de caption ausentes em {ARTIFACTS_DIR}/")
+    artifacts = build_and_load_captioning_from_files(weights_path=paths[0], vocab_path=paths[1], metadata_path=paths[2])
+
+    for width, height, fmt in SAMPLES:
+        data = _sample_bytes(width, height, fmt)
+        expected = greedy_caption(image_array=preprocess_image_bytes(data, artifacts.image_size), artifacts=artifacts)
+        actual = greedy_caption(image_array=_api_preprocess(data, artifacts.image_size), artifacts=artifacts)
+        assert actual == expected, (width, height, fmt)
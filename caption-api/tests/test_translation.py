@@ -0,0 +1,65 @@
+import pytest
+
+from translation import DictTranslator, TranslationCache, build_translation_cache
+
+
+class CountingTranslator:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return f"pt:{text}"
+
+
+def test_hits_and_misses():
+    translator = CountingTranslator()
+    cache = TranslationCache(translator, maxsize=4)
+
+    assert cache.translate("a dog") == "pt:a dog"
+    assert cache.translate(" a dog ") == "pt:a dog"
+    assert translator.calls == ["a dog"]
+    assert cache.stats() == {"size": 1, "maxsize": 4, "hits": 1, "misses": 1}
+
+
+def test_lru_eviction_keeps_recently_used():
+    translator = CountingTranslator()
+    cache = TranslationCache(translator, maxsize=2)
+
+    cache.translate("a")
+    cache.translate("b")
+    cache.translate("a")  # "b" becomes the least recently used
+    cache.translate("c")  # evicts "b"
+    cache.translate("a")
+    cache.translate("b")
+
+    assert translator.calls == ["a", "b", "c", "b"]
+    assert cache.stats()["size"] == 2
+
+
+def test_dict_translator_stub():
+    cache = TranslationCache(DictTranslator({"a dog": "um cachorro"}))
+
+    assert cache.translate("a dog") == "um cachorro"
+    assert cache.translate("a cat") == "a cat"
+
+
+def test_translate_or_none_on_failure_is_not_cached():
+    def failing(text):
+        raise OSError("network down")
+
+    cache = TranslationCache(failing)
+
+    assert cache.translate_or_none("a dog") is None
+    assert cache.translate_or_none("a dog") is None
+    assert cache.stats()["size"] == 0
+    assert cache.stats()["misses"] == 2
+
+
+def test_invalid_maxsize():
+    with pytest.raises(ValueError):
+        TranslationCache(DictTranslator({}), maxsize=0)
+
+
+def test_build_translation_cache_without_key():
+    assert build_translation_cache(api_key=None, url=None, maxsize=8) is None
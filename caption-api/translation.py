@@ -0,0 +1,126 @@
+import json
+import logging
+import threading
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# A translator receives an English caption and returns its pt-BR translation.
+# Anything with this signature works (tests can plug in a local stub).
+Translator = Callable[[str], str]
+
+
+class GoogleTranslator:
+    """Translator backed by the Google Translate v2 REST API (same API used by the RN app)."""
+
+    def __init__(
+        self,
+        *,
+        api_key: str,
+        url: str = "https://translation.googleapis.com/language/translate/v2",
+        target: str = "pt-BR",
+        timeout: float = 5.0,
+    ):
+        self.api_key = api_key
+        self.url = url
+        self.target = target
+        self.timeout = timeout
+
+    def __call__(self, text: str) -> str:
+        body = json.dumps({"q": text, "target": self.target, "format": "text"}).encode("utf-8")
+        req = urllib.request.Request(
+            f"{self.url}?{urllib.parse.urlencode({'key': self.api_key})}",
+            data=body,
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            payload = json.loads(resp.read().decode("utf-8"))
+        return str(payload["data"]["translations"][0]["translatedText"])
+
+
+class DictTranslator:
+    """Local translator from a fixed table; unknown captions are returned unchanged."""
+
+    def __init__(self, table: Dict[str, str]):
+        self.table = dict(table)
+
+    def __call__(self, text: str) -> str:
+        return self.table.get(text, text)
+
+
+class TranslationCache:
+    """Bounded LRU cache of full captions in front of a pluggable translator.
+
+    Captions come from a closed vocabulary, so the same phrases repeat a lot and
+    most requests are answered without a network round trip.
+    """
+
+    def __init__(self, translator: Translator, maxsize: int = 1024):
+        if maxsize <= 0:
+            raise ValueError("maxsize deve ser positivo")
+        self.translator = translator
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def translate(self, text: str) -> str:
+        key = text.strip()
+        if not key:
+            return ""
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        # Call the translator outside the lock: a slow network call must not block hits.
+        translated = self.translator(key)
+
+        with self._lock:
+            self._entries[key] = translated
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return translated
+
+    def translate_or_none(self, text: str) -> Optional[str]:
+        # None tells the client to fall back to its own translation; failures are not cached.
+        try:
+            return self.translate(text)
+        except Exception as e:
+            logger.warning("Falha ao traduzir caption: %s", e)
+            return None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def build_translation_cache(
+    *,
+    api_key: Optional[str],
+    url: Optional[str],
+    maxsize: int,
+) -> Optional[TranslationCache]:
+    """Returns a cache over Google Translate, or None when no API key is configured."""
+    if not api_key:
+        return None
+    kwargs = {"api_key": api_key}
+    if url:
+        kwargs["url"] = url
+    return TranslationCache(GoogleTranslator(**kwargs), maxsize=maxsize)
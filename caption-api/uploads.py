@@ -0,0 +1,36 @@
+from typing import Tuple
+
+import numpy as np
+from fastapi import HTTPException
+from PIL import Image
+
+# Generic upload/body helpers live in vision_common; re-exported so callers keep importing from here.
+from vision_common.uploads import (  # noqa: F401
+    PRESIZED_IMAGE_CONTENT_TYPES,
+    RAW_CONTENT_TYPES,
+    RequestSizeLimitMiddleware,
+    decode_presized,
+    open_image_checked,
+    read_body_limited,
+    read_upload_limited,
+)
+
+
+def decode_downscaled(img: Image.Image, min_size: Tuple[int, int]) -> np.ndarray:
+    """Decodes to a uint8 RGB array, shrinking early but never below min_size (height, width).
+
+    The final resize to the model input still happens in TensorFlow, like in the notebook;
+    this only avoids materializing a full-resolution bitmap for large photos.
+    """
+    min_h, min_w = int(min_size[0]), int(min_size[1])
+    # JPEG: libjpeg decodes directly at 1/2, 1/4 or 1/8 scale (result stays >= requested size).
+    img.draft("RGB", (min_w, min_h))
+    try:
+        img = img.convert("RGB")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail="Falha ao decodificar imagem") from e
+    # Other formats: cheap box reduction by an integer factor, keeping both sides >= min_size.
+    factor = min(img.width // min_w, img.height // min_h)
+    if factor >= 2:
+        img = img.reduce(factor)
+    return np.asarray(img, dtype=np.uint8)
@@ -0,0 +1,172 @@
+# Vendored copy of vision_common/bulk.py; edit the original and run scripts/sync_vision_common.py.
+"""Input discovery, NDJSON checkpointing, prefetching and the batch loop of both bulk.py CLIs."""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Set
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif"}
+
+
+def iter_input_paths(source: str) -> List[str]:
+    if os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            for name in files:
+                if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                    paths.append(os.path.join(root, name))
+        return sorted(paths)
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    paths = []
+    with open(source, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            path = json.loads(line)["path"] if line.startswith("{") else line
+            paths.append(path if os.path.isabs(path) else os.path.join(base_dir, path))
+    return paths
+
+
+def load_checkpoint(output_path: str, retry_errors: bool) -> Set[str]:
+    """Returns the paths already written to output_path (the NDJSON output is the checkpoint).
+
+    With retry_errors, the error lines are removed from the file so each path keeps
+    exactly one record once it is reprocessed.
+    """
+    if not os.path.exists(output_path):
+        return set()
+
+    with open(output_path, "rb+") as f:
+        data = f.read()
+        # A crash mid-write can leave a partial last line: drop it before appending.
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+            data = data[: data.rfind(b"\n") + 1]
+
+    done = set()
+    kept: List[str] = []
+    dropped = 0
+    for line in data.decode("utf-8").splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if retry_errors and "error" in record:
+            dropped += 1
+            continue
+        done.add(record["path"])
+        kept.append(line)
+
+    if dropped:
+        # Write to a temp file and swap it in, so a crash never leaves a half-rewritten checkpoint.
+        tmp_path = output_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(line + "\n" for line in kept)
+        os.replace(tmp_path, output_path)
+    return done
+
+
+def iter_decoded(
+    executor: Executor,
+    worker: Callable[..., Dict[str, Any]],
+    paths: Iterable[str],
+    prefetch: int,
+    **worker_kwargs: Any,
+) -> Iterator[Dict[str, Any]]:
+    # Keep at most `prefetch` decodes in flight and yield them in input order.
+    pending: Deque[Future] = deque()
+    for path in paths:
+        pending.append(executor.submit(worker, path, **worker_kwargs))
+        if len(pending) >= prefetch:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def iter_batches(items: Iterable[Dict[str, Any]], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def add_bulk_arguments(parser: argparse.ArgumentParser, env_prefix: str) -> None:
+    """Arguments shared by both CLIs; the byte/pixel limits default to the API's env vars."""
+    parser.add_argument("input", help="Diretório de imagens ou manifesto (um caminho por linha)")
+    parser.add_argument("--output", required=True, help="Arquivo NDJSON de saída")
+    parser.add_argument("--resume", action="store_true", help="Pula caminhos já presentes na saída")
+    parser.add_argument("--retry-errors", action="store_true", help="Com --resume, reprocessa linhas com erro")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processos de decodificação")
+    parser.add_argument("--prefetch", type=int, default=0, help="Decodificações em andamento (padrão: 4 lotes)")
+    parser.add_argument("--max-bytes", type=int, default=int(os.environ.get(f"{env_prefix}_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024))))
+    parser.add_argument("--max-pixels", type=int, default=int(os.environ.get(f"{env_prefix}_MAX_IMAGE_PIXELS", "40000000")))
+
+
+def pending_paths(args: argparse.Namespace, logger: logging.Logger) -> List[str]:
+    paths = iter_input_paths(args.input)
+    done = load_checkpoint(args.output, args.retry_errors) if args.resume else set()
+    todo = [p for p in paths if p not in done]
+    logger.info("%d imagens encontradas, %d já processadas, %d pendentes", len(paths), len(paths) - len(todo), len(todo))
+    return todo
+
+
+def run_bulk(
+    todo: List[str],
+    args: argparse.Namespace,
+    *,
+    worker: Callable[..., Dict[str, Any]],
+    worker_kwargs: Dict[str, Any],
+    infer: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]],
+    logger: logging.Logger,
+) -> None:
+    """Decodes todo in a process pool and appends one NDJSON record per path to args.output.
+
+    worker(path, max_bytes=..., max_pixels=..., **worker_kwargs) returns {"path", "sha256",
+    ...} or {"path", "error"}. infer receives the decoded items of a batch and returns one
+    dict of output fields per item, in the same order.
+    """
+    prefetch = args.prefetch or 4 * args.batch_size
+    processed = 0
+    t0 = time.time()
+    # spawn: never fork a process that already initialized TensorFlow/torch.
+    ctx = multiprocessing.get_context("spawn")
+    with open(args.output, "a" if args.resume else "w", encoding="utf-8") as out, ProcessPoolExecutor(
+        max_workers=args.workers, mp_context=ctx
+    ) as executor:
+        decoded = iter_decoded(
+            executor,
+            worker,
+            todo,
+            prefetch,
+            max_bytes=args.max_bytes,
+            max_pixels=args.max_pixels,
+            **worker_kwargs,
+        )
+        for batch in iter_batches(decoded, args.batch_size):
+            ok = [item for item in batch if "error" not in item]
+            results = iter(infer(ok) if ok else [])
+
+            for item in batch:
+                if "error" in item:
+                    record = {"path": item["path"], "error": item["error"]}
+                else:
+                    record = {"path": item["path"], "sha256": item["sha256"], **next(results)}
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            # Flush per batch: the output file doubles as the resume checkpoint.
+            out.flush()
+
+            processed += len(batch)
+            elapsed = time.time() - t0
+            logger.info("%d/%d imagens (%.1f img/s)", processed, len(todo), processed / max(elapsed, 1e-9))
@@ -0,0 +1,69 @@
+"""Precompute the pt-BR table for the detector class names.
+
+Reads object-detection-model/labels.json and writes object-detection-model/labels_pt.json
+({ "translations": { "person": "pessoa", ... } }). Run it once after exporting the model:
+
+    python build_labels_pt.py --api-key <GOOGLE_TRANSLATE_KEY>
+
+Entries already present in labels_pt.json are kept, so manual fixes survive re-runs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import Dict, List
+
+APP_DIR = Path(__file__).resolve().parent
+MODEL_DIR = APP_DIR / "object-detection-model"
+
+TRANSLATE_URL = "https://translation.googleapis.com/language/translate/v2"
+
+
+def _translate_batch(texts: List[str], *, api_key: str, target: str) -> List[str]:
+    body = json.dumps({"q": texts, "target": target, "format": "text"}).encode("utf-8")
+    req = urllib.request.Request(
+        f"{TRANSLATE_URL}?{urllib.parse.urlencode({'key': api_key})}",
+        data=body,
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        payload = json.loads(resp.read().decode("utf-8"))
+    return [str(t["translatedText"]) for t in payload["data"]["translations"]]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Gera labels_pt.json a partir de labels.json")
+    parser.add_argument("--api-key", required=True, help="Chave da API do Google Translate")
+    parser.add_argument("--labels", type=Path, default=MODEL_DIR / "labels.json")
+    parser.add_argument("--output", type=Path, default=MODEL_DIR / "labels_pt.json")
+    parser.add_argument("--target", default="pt-BR")
+    args = parser.parse_args()
+
+    labels = [str(x) for x in json.loads(args.labels.read_text(encoding="utf-8"))["classes"]]
+
+    table: Dict[str, str] = {}
+    if args.output.exists():
+        table = dict(json.loads(args.output.read_text(encoding="utf-8")).get("translations", {}))
+
+    # COCO-style class names use underscores in some exports ("traffic_light").
+    pending = [c for c in labels if c not in table]
+    if pending:
+        queries = [c.replace("_", " ") for c in pending]
+        for cls, translated in zip(pending, _translate_batch(queries, api_key=args.api_key, target=args.target)):
+            table[cls] = translated
+
+    ordered = {c: table[c] for c in labels}
+    args.output.write_text(
+        json.dumps({"translations": ordered}, ensure_ascii=False, indent=2) + "\n",
+        encoding="utf-8",
+    )
+    print(f"{len(pending)} classes traduzidas, {len(ordered)} no total -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Bulk offline object detection over a photo archive, written as NDJSON (one JSON object per line).
+
+    python bulk.py photos/ --output objects.ndjson
+    python bulk.py manifest.txt --output objects.ndjson --resume
+
+The input is a directory (searched recursively) or a manifest with one path per line
+(or JSON lines with a "path" field). Images are decoded (already downscaled to imgsz) in a
+process pool that prefetches ahead of the model, and YOLO runs on whole batches. The model
+is loaded exactly like the API does (main._ensure_loaded). With --resume, paths already
+present in the output are skipped, so an interrupted run continues where it stopped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from uploads import decode_image_for_imgsz
+from vision_common.bulk import add_bulk_arguments, pending_paths, run_bulk
+
+# NOTE: main (ultralytics/torch) is imported inside main(): decode workers are spawned
+# processes that re-import this module and must stay lightweight.
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("object_detection_bulk")
+
+
+def _decode_worker(path: str, imgsz: int, max_bytes: int, max_pixels: int) -> Dict[str, Any]:
+    try:
+        if os.path.getsize(path) > max_bytes:
+            return {"path": path, "error": f"Arquivo excede o limite de {max_bytes} bytes"}
+        with open(path, "rb") as f:
+            data = f.read()
+        image, bbox_scale = decode_image_for_imgsz(data, imgsz, max_pixels)
+        return {
+            "path": path,
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "image": image,
+            "bbox_scale": bbox_scale,
+        }
+    except Exception as e:
+        # HTTPException from the upload helpers carries the message in .detail
+        return {"path": path, "error": str(getattr(e, "detail", e))}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Detecta objetos em lote (NDJSON) para um diretório ou manifesto")
+    add_bulk_arguments(parser, "DETECTION")
+    parser.add_argument("--conf", type=float, default=None)
+    parser.add_argument("--iou", type=float, default=None)
+    parser.add_argument("--imgsz", type=int, default=None)
+    parser.add_argument("--max-det", type=int, default=None)
+    parser.add_argument("--lang", choices=["pt", "pt-BR"], default=None, help="Adiciona class_pt (labels_pt.json)")
+    args = parser.parse_args()
+
+    import main as api
+
+    todo = pending_paths(args, logger)
+    if not todo:
+        return
+
+    api._ensure_loaded()
+    assert api._model is not None
+    assert api._config is not None
+    model = api._model
+    config = api._config
+
+    conf = float(args.conf if args.conf is not None else config.conf)
+    iou = float(args.iou if args.iou is not None else config.iou)
+    imgsz = int(args.imgsz if args.imgsz is not None else config.imgsz)
+    max_det = int(args.max_det if args.max_det is not None else config.max_det)
+    lang: Optional[str] = args.lang
+
+    def detect_batch(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        preds = model.predict(
+            source=[item["image"] for item in items],
+            conf=conf,
+            iou=iou,
+            imgsz=imgsz,
+            max_det=max_det,
+            verbose=False,
+        )
+        return [
+            {"detected_objects": api._objects_from_result(pred, lang=lang, bbox_scale=item["bbox_scale"])}
+            for pred, item in zip(preds, items)
+        ]
+
+    run_bulk(
+        todo,
+        args,
+        worker=_decode_worker,
+        worker_kwargs={"imgsz": imgsz},
+        infer=detect_batch,
+        logger=logger,
+    )
+
+
+if __name__ == "__main__":
+    main()
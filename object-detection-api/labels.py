@@ -0,0 +1,27 @@
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("object_detection_api")
+
+
+def load_labels_pt(path: Path, labels: List[str]) -> Optional[Dict[str, str]]:
+    """Reads the optional pt-BR table written by build_labels_pt.py.
+
+    Returns None when the file does not exist. Classes missing from the table are only
+    logged: the API answers class_pt=null for them and the app falls back to its own translation.
+    """
+    if not path.exists():
+        return None
+    try:
+        raw = json.loads(path.read_text(encoding="utf-8")).get("translations")
+    except Exception as e:
+        raise RuntimeError(f"Falha ao ler JSON: {path}: {e}") from e
+    if not isinstance(raw, dict):
+        raise RuntimeError("labels_pt.json inválido: esperado { translations: { classe: tradução } }")
+    table = {str(k): str(v) for k, v in raw.items()}
+    missing = [c for c in labels if c not in table]
+    if missing:
+        logger.warning("labels_pt.json sem tradução para %d classes: %s", len(missing), missing[:8])
+    return table
@@ -1,20 +1,36 @@
 from __future__ import annotations
 
 import base64
+import hashlib
 import json
 import logging
 import os
-import tempfile
+import threading
 import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
 
 import numpy as np
 import psutil
-from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi import FastAPI, File, Header, HTTPException, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+
+from labels import load_labels_pt
+from vision_common.health import HealthMonitor
+from vision_common.profiling import Profiler, admin_router, TorchTraceBackend
+from vision_common.singleflight import SingleFlight
+from uploads import (
+    PRESIZED_IMAGE_CONTENT_TYPES,
+    RAW_CONTENT_TYPES,
+    RequestSizeLimitMiddleware,
+    decode_image_for_imgsz,
+    decode_presized,
+    read_body_limited,
+    read_upload_limited,
+)
 
 try:
     from ultralytics import YOLO
@@ -49,6 +65,33 @@ MODEL_DIR = APP_DIR / "object-detection-model"
 CONFIG_PATH = MODEL_DIR / "config.json"
 LABELS_PATH = MODEL_DIR / "labels.json"
 WEIGHTS_PATH = MODEL_DIR / "best.pt"
+# Optional precomputed pt-BR table for the class names (see build_labels_pt.py).
+LABELS_PT_PATH = Path(os.environ.get("DETECTION_LABELS_PT_PATH", str(MODEL_DIR / "labels_pt.json")))
+SUPPORTED_LANGS = ("pt", "pt-BR")
+
+# Readiness: only report ready after N warm-up predictions at each serving shape.
+WARMUP_RUNS = int(os.environ.get("DETECTION_WARMUP_RUNS", "2"))
+# Extra imgsz values clients use besides config.imgsz (comma-separated, e.g. "320,480").
+WARMUP_EXTRA_IMGSZ = [int(x) for x in os.environ.get("DETECTION_WARMUP_IMGSZ", "").split(",") if x.strip()]
+# Aspect ratios (width:height) warmed at each imgsz. YOLO letterboxes to the smallest stride multiple,
+# so a 3:4 phone photo runs as a 640x480 tensor, a different shape than a square image.
+WARMUP_ASPECTS = [
+    tuple(int(v) for v in x.split(":"))
+    for x in os.environ.get("DETECTION_WARMUP_ASPECTS", "1:1,3:4,4:3").split(",")
+    if x.strip()
+]
+HEALTH_REFRESH_SECONDS = float(os.environ.get("DETECTION_HEALTH_REFRESH_SECONDS", "5"))
+
+# Upload guardrails (bytes of the encoded image and pixel count read from the image header).
+MAX_UPLOAD_BYTES = int(os.environ.get("DETECTION_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+MAX_IMAGE_PIXELS = int(os.environ.get("DETECTION_MAX_IMAGE_PIXELS", "40000000"))
+# Base64 grows the payload by 4/3; leave room for the multipart/JSON envelope too.
+MAX_BASE64_CHARS = (MAX_UPLOAD_BYTES + 2) // 3 * 4
+MAX_REQUEST_BYTES = MAX_BASE64_CHARS + 64 * 1024
+
+# On-demand profiling (/admin/profile); disabled unless a token is configured.
+ADMIN_TOKEN = os.environ.get("DETECTION_ADMIN_TOKEN")
+PROFILE_MAX_SECONDS = float(os.environ.get("DETECTION_PROFILE_MAX_SECONDS", "300"))
 
 
 app = FastAPI(title="Object Detection API (YOLOv8n)", version="1.0.0")
@@ -61,10 +104,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Caps every request body (declared or chunked) before the multipart/JSON parsers read it.
+app.add_middleware(RequestSizeLimitMiddleware, max_bytes=MAX_REQUEST_BYTES)
+
 
 _model: Optional[YOLO] = None
 _config: Optional[ModelArtifacts] = None
 _labels: Optional[List[str]] = None
+_labels_pt: Optional[Dict[str, str]] = None
+
+# Loading happens once in the background (HealthMonitor) or in bulk.py; never per request.
+_load_lock = threading.Lock()
+
+# Ultralytics predictors are not thread-safe: one predict() at a time on the shared model.
+_predict_lock = threading.Lock()
+_inflight = SingleFlight()
+_profiler = Profiler(TorchTraceBackend())
 
 
 def _load_json(path: Path) -> Dict[str, Any]:
@@ -89,7 +144,12 @@ def _get_memory_usage() -> Dict[str, float]:
 
 
 def _ensure_loaded() -> None:
-    global _model, _config, _labels
+    with _load_lock:
+        _load_unlocked()
+
+
+def _load_unlocked() -> None:
+    global _model, _config, _labels, _labels_pt
     if _model is not None and _config is not None and _labels is not None:
         return
 
@@ -109,31 +169,27 @@ def _ensure_loaded() -> None:
         raise RuntimeError(f"Pesos não encontrados: {weights_path}")
 
     logger.info("Carregando modelo YOLO: %s", weights_path)
-    _model = YOLO(str(weights_path))
+    model = YOLO(str(weights_path))
     _config = config
     _labels = [str(x) for x in labels]
-    logger.info("Modelo carregado. classes=%d", len(_labels))
+    _labels_pt = load_labels_pt(LABELS_PT_PATH, _labels)
+    # Published last: handlers answer 503 until config and labels are in place.
+    _model = model
+    logger.info(
+        "Modelo carregado. classes=%d traduções_pt=%d",
+        len(_labels),
+        len(_labels_pt) if _labels_pt else 0,
+    )
 
 
-def _suffix_from_content_type(content_type: Optional[str]) -> str:
-    if not content_type:
-        return ".jpg"
-    ct = content_type.lower()
-    if "png" in ct:
-        return ".png"
-    if "webp" in ct:
-        return ".webp"
-    return ".jpg"
+def _require_loaded() -> None:
+    if _model is None:
+        raise HTTPException(status_code=503, detail="Modelo ainda não carregou.")
 
 
-def _write_temp_image_bytes(data: bytes, suffix: str) -> Path:
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-    try:
-        tmp.write(data)
-        tmp.flush()
-        return Path(tmp.name)
-    finally:
-        tmp.close()
+def _check_lang(lang: Optional[str]) -> None:
+    if lang is not None and lang not in SUPPORTED_LANGS:
+        raise HTTPException(status_code=400, detail=f"Idioma não suportado: {lang}")
 
 
 def _decode_base64_image(image_base64: str) -> bytes:
@@ -144,29 +200,20 @@ def _decode_base64_image(image_base64: str) -> bytes:
             s = s.split("base64,", 1)[1]
         except Exception as e:
             raise HTTPException(status_code=400, detail="Data URL inválida") from e
+    # Check the encoded length first: never decode a payload that is already too large.
+    if len(s) > MAX_BASE64_CHARS:
+        raise HTTPException(status_code=413, detail=f"Imagem excede o limite de {MAX_UPLOAD_BYTES} bytes")
     try:
         return base64.b64decode(s, validate=True)
     except Exception as e:
         raise HTTPException(status_code=400, detail="Base64 inválido") from e
 
 
-def _predict_image_path(image_path: Path, *, conf: float, iou: float, imgsz: int, max_det: int) -> Dict[str, Any]:
-    _ensure_loaded()
-    assert _model is not None
+def _objects_from_result(
+    pred: Any, *, lang: Optional[str] = None, bbox_scale: Tuple[float, float] = (1.0, 1.0)
+) -> List[Dict[str, Any]]:
+    # One ultralytics Results object -> detected objects, sorted by confidence.
     assert _config is not None
-    assert _labels is not None
-
-    t0 = time.time()
-    pred = _model.predict(
-        source=str(image_path),
-        conf=conf,
-        iou=iou,
-        imgsz=imgsz,
-        max_det=max_det,
-        verbose=False,
-    )[0]
-    dt_ms = (time.time() - t0) * 1000.0
-
     names = pred.names  # dict[int,str]
     objects: List[Dict[str, Any]] = []
 
@@ -176,13 +223,49 @@ def _predict_image_path(image_path: Path, *, conf: float, iou: float, imgsz: int
         class_name = names.get(cls_id, str(cls_id))
         # Maintain compatibility with the RN app (DetectedObject: {class, confidence, class_id})
         item: Dict[str, Any] = {"class": class_name, "confidence": score, "class_id": cls_id}
+        if lang is not None:
+            # None tells the client to fall back to its own translation.
+            item["class_pt"] = _labels_pt.get(class_name) if _labels_pt else None
         if _config.return_bboxes:
             # xyxy in pixels (float)
-            xyxy = b.xyxy.cpu().numpy().reshape(-1).tolist()
+            # (bbox_scale maps boxes from a downscaled source back to the uploaded image, per axis)
+            scale_x, scale_y = bbox_scale
+            xyxy = (b.xyxy.cpu().numpy().reshape(-1) * np.array([scale_x, scale_y, scale_x, scale_y])).tolist()
             item["bbox_xyxy"] = xyxy
         objects.append(item)
 
     objects.sort(key=lambda x: x["confidence"], reverse=True)
+    return objects
+
+
+def _predict_source(
+    source: Union[str, np.ndarray],
+    *,
+    conf: float,
+    iou: float,
+    imgsz: int,
+    max_det: int,
+    lang: Optional[str] = None,
+    bbox_scale: Tuple[float, float] = (1.0, 1.0),
+) -> Dict[str, Any]:
+    _require_loaded()
+    assert _model is not None
+    assert _config is not None
+    assert _labels is not None
+
+    with _predict_lock, _profiler.trace():
+        t0 = time.time()
+        pred = _model.predict(
+            source=source,
+            conf=conf,
+            iou=iou,
+            imgsz=imgsz,
+            max_det=max_det,
+            verbose=False,
+        )[0]
+    dt_ms = (time.time() - t0) * 1000.0
+
+    objects = _objects_from_result(pred, lang=lang, bbox_scale=bbox_scale)
 
     # For compatibility with the existing app interface:
     # - success/message
@@ -211,9 +294,87 @@ def _predict_image_path(image_path: Path, *, conf: float, iou: float, imgsz: int
     }
 
 
+def _warmup_imgsz() -> List[int]:
+    assert _config is not None
+    sizes = [_config.imgsz]
+    for imgsz in WARMUP_EXTRA_IMGSZ:
+        if imgsz not in sizes:
+            sizes.append(imgsz)
+    return sizes
+
+
+def _warmup_shapes() -> List[Tuple[int, int, int]]:
+    # (imgsz, height, width): dummy images with the longest side at imgsz, like decoded uploads.
+    shapes = []
+    for imgsz in _warmup_imgsz():
+        for aspect_w, aspect_h in WARMUP_ASPECTS:
+            if aspect_w >= aspect_h:
+                shape = (imgsz, max(1, round(imgsz * aspect_h / aspect_w)), imgsz)
+            else:
+                shape = (imgsz, imgsz, max(1, round(imgsz * aspect_w / aspect_h)))
+            if shape not in shapes:
+                shapes.append(shape)
+    return shapes
+
+
+def _warm_up() -> None:
+    assert _model is not None
+    assert _config is not None
+
+    t0 = time.time()
+    for imgsz, height, width in _warmup_shapes():
+        dummy = np.zeros((height, width, 3), dtype=np.uint8)
+        for _ in range(WARMUP_RUNS):
+            with _predict_lock:
+                _model.predict(
+                    source=dummy,
+                    conf=_config.conf,
+                    iou=_config.iou,
+                    imgsz=imgsz,
+                    max_det=_config.max_det,
+                    verbose=False,
+                )
+    logger.info(
+        "Warm-up concluído: %d execuções por shape %s em %.0f ms",
+        WARMUP_RUNS,
+        [f"{w}x{h}@{imgsz}" for imgsz, h, w in _warmup_shapes()],
+        (time.time() - t0) * 1000.0,
+    )
+
+
+def _build_health_snapshot() -> Dict[str, Any]:
+    return {
+        "warmup_runs": WARMUP_RUNS,
+        "warmup_imgsz": _warmup_imgsz() if _config is not None else [],
+        "warmup_shapes": [f"{w}x{h}@{imgsz}" for imgsz, h, w in _warmup_shapes()] if _config is not None else [],
+        "model_loaded": _model is not None,
+        "config_loaded": _config is not None,
+        "labels_loaded": _labels is not None,
+        "labels_count": len(_labels) if _labels else 0,
+        "labels_pt_count": len(_labels_pt) if _labels_pt else 0,
+        "inflight": _inflight.stats(),
+        "memory": _get_memory_usage(),
+    }
+
+
+_health = HealthMonitor(
+    load=_ensure_loaded,
+    warm_up=_warm_up,
+    build_snapshot=_build_health_snapshot,
+    refresh_seconds=HEALTH_REFRESH_SECONDS,
+)
+
+
 @app.on_event("startup")
 async def startup_event() -> None:
-    _ensure_loaded()
+    # Loading and warm-up run in the background so liveness probes answer while they happen.
+    _health.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    _health.stop()
+    _profiler.stop(reason="shutdown")
 
 
 @app.get("/")
@@ -223,32 +384,92 @@ async def root() -> Dict[str, Any]:
 
 @app.get("/health")
 async def health() -> Dict[str, Any]:
-    ok = True
-    err: Optional[str] = None
-    try:
-        _ensure_loaded()
-    except Exception as e:
-        ok = False
-        err = str(e)
+    # Served from the background snapshot: never loads the model or calls psutil in the probe.
+    return _health.snapshot
+
+
+@app.get("/health/live")
+async def health_live() -> Dict[str, Any]:
+    return {"status": "alive"}
 
-    return {
-        "status": "healthy" if ok else "error",
-        "model_loaded": _model is not None,
-        "config_loaded": _config is not None,
-        "labels_loaded": _labels is not None,
-        "labels_count": len(_labels) if _labels else 0,
-        "memory": _get_memory_usage(),
-        "error": err,
-    }
+
+@app.get("/health/ready")
+async def health_ready() -> JSONResponse:
+    return _health.ready_response()
 
 
 @app.get("/categories")
 async def categories() -> Dict[str, Any]:
-    _ensure_loaded()
+    _require_loaded()
     assert _labels is not None
     return {"categories": _labels, "count": len(_labels)}
 
 
+async def _predict_coalesced(
+    kind: Hashable,
+    data: bytes,
+    decode: Callable[[], Tuple[np.ndarray, Tuple[float, float]]],
+    *,
+    conf: float,
+    iou: float,
+    imgsz: int,
+    max_det: int,
+    lang: Optional[str],
+) -> Dict[str, Any]:
+    # Identical requests (same bytes + parameters) already in flight share one prediction;
+    # decode and predict run off the event loop.
+    key = (kind, hashlib.sha256(data).hexdigest(), conf, iou, imgsz, max_det, lang)
+
+    def _run() -> Dict[str, Any]:
+        image, bbox_scale = decode()
+        return _predict_source(
+            image,
+            conf=conf,
+            iou=iou,
+            imgsz=imgsz,
+            max_det=max_det,
+            lang=lang,
+            bbox_scale=bbox_scale,
+        )
+
+    try:
+        return await _inflight.do(key, lambda: run_in_threadpool(_run))
+    finally:
+        # Once per request, also for duplicates served by a shared prediction.
+        _profiler.request_finished()
+
+
+@app.get("/capabilities")
+async def capabilities() -> Dict[str, Any]:
+    # Lets clients resize/encode on device so the server skips decode and resize entirely.
+    _require_loaded()
+    assert _config is not None
+    return {
+        "input": {
+            "imgsz": _config.imgsz,
+            "max_side": _config.imgsz,
+            "channels": 3,
+            "dtype": "uint8",
+            "layout": "HWC",
+            "color": "RGB",
+            "resize": "longest_side",
+        },
+        "endpoints": {
+            "/detect": {"encodings": ["multipart/form-data"], "any_size": True},
+            "/detect/base64": {"encodings": ["application/json"], "any_size": True},
+            "/detect/raw": {
+                "encodings": list(RAW_CONTENT_TYPES + PRESIZED_IMAGE_CONTENT_TYPES),
+                "headers": ["X-Image-Width", "X-Image-Height"],
+                "any_size": False,
+                # Longest side accepted; follows the imgsz query parameter when one is sent.
+                "max_side": _config.imgsz,
+            },
+        },
+        "limits": {"max_upload_bytes": MAX_UPLOAD_BYTES, "max_image_pixels": MAX_IMAGE_PIXELS},
+        "languages": list(SUPPORTED_LANGS),
+    }
+
+
 @app.post("/detect")
 async def detect(
     file: UploadFile = File(...),
@@ -256,11 +477,13 @@ async def detect(
     iou: Optional[float] = None,
     imgsz: Optional[int] = None,
     max_det: Optional[int] = None,
+    lang: Optional[str] = None,
 ) -> JSONResponse:
+    _check_lang(lang)
     if not file.content_type or not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="Arquivo deve ser uma imagem")
 
-    _ensure_loaded()
+    _require_loaded()
     assert _config is not None
 
     conf_v = float(conf if conf is not None else _config.conf)
@@ -268,19 +491,18 @@ async def detect(
     imgsz_v = int(imgsz if imgsz is not None else _config.imgsz)
     max_det_v = int(max_det if max_det is not None else _config.max_det)
 
-    suffix = _suffix_from_content_type(file.content_type)
-    tmp_path: Optional[Path] = None
-    try:
-        data = await file.read()
-        tmp_path = _write_temp_image_bytes(data, suffix=suffix)
-        out = _predict_image_path(tmp_path, conf=conf_v, iou=iou_v, imgsz=imgsz_v, max_det=max_det_v)
-        return JSONResponse(out)
-    finally:
-        if tmp_path and tmp_path.exists():
-            try:
-                tmp_path.unlink()
-            except Exception:
-                pass
+    data = await read_upload_limited(file, MAX_UPLOAD_BYTES)
+    out = await _predict_coalesced(
+        "file",
+        data,
+        lambda: decode_image_for_imgsz(data, imgsz_v, MAX_IMAGE_PIXELS),
+        conf=conf_v,
+        iou=iou_v,
+        imgsz=imgsz_v,
+        max_det=max_det_v,
+        lang=lang,
+    )
+    return JSONResponse(out)
 
 
 @app.post("/detect/base64")
@@ -290,8 +512,10 @@ async def detect_base64(
     iou: Optional[float] = None,
     imgsz: Optional[int] = None,
     max_det: Optional[int] = None,
+    lang: Optional[str] = None,
 ) -> JSONResponse:
-    _ensure_loaded()
+    _check_lang(lang)
+    _require_loaded()
     assert _config is not None
 
     conf_v = float(conf if conf is not None else _config.conf)
@@ -299,15 +523,69 @@ async def detect_base64(
     imgsz_v = int(imgsz if imgsz is not None else _config.imgsz)
     max_det_v = int(max_det if max_det is not None else _config.max_det)
 
-    tmp_path: Optional[Path] = None
-    try:
-        data = _decode_base64_image(payload.image_base64)
-        tmp_path = _write_temp_image_bytes(data, suffix=".jpg")
-        out = _predict_image_path(tmp_path, conf=conf_v, iou=iou_v, imgsz=imgsz_v, max_det=max_det_v)
-        return JSONResponse(out)
-    finally:
-        if tmp_path and tmp_path.exists():
-            try:
-                tmp_path.unlink()
-            except Exception:
-                pass
+    data = _decode_base64_image(payload.image_base64)
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Imagem excede o limite de {MAX_UPLOAD_BYTES} bytes")
+    # Same key as /detect: the app may retry the same photo through either endpoint.
+    out = await _predict_coalesced(
+        "file",
+        data,
+        lambda: decode_image_for_imgsz(data, imgsz_v, MAX_IMAGE_PIXELS),
+        conf=conf_v,
+        iou=iou_v,
+        imgsz=imgsz_v,
+        max_det=max_det_v,
+        lang=lang,
+    )
+    return JSONResponse(out)
+
+
+@app.post("/detect/raw")
+async def detect_raw(
+    request: Request,
+    width: int = Header(..., alias="X-Image-Width"),
+    height: int = Header(..., alias="X-Image-Height"),
+    conf: Optional[float] = None,
+    iou: Optional[float] = None,
+    imgsz: Optional[int] = None,
+    max_det: Optional[int] = None,
+    lang: Optional[str] = None,
+) -> JSONResponse:
+    """Pre-sized input: raw RGB uint8 buffer (or a JPEG) with its longest side at most imgsz."""
+    _check_lang(lang)
+    _require_loaded()
+    assert _config is not None
+
+    conf_v = float(conf if conf is not None else _config.conf)
+    iou_v = float(iou if iou is not None else _config.iou)
+    imgsz_v = int(imgsz if imgsz is not None else _config.imgsz)
+    max_det_v = int(max_det if max_det is not None else _config.max_det)
+
+    if width <= 0 or height <= 0 or max(width, height) > imgsz_v:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Dimensões {width}x{height} inválidas; o maior lado deve ser no máximo {imgsz_v} (veja /capabilities)",
+        )
+
+    data = await read_body_limited(request, MAX_UPLOAD_BYTES)
+    content_type = request.headers.get("content-type")
+
+    def _decode() -> Tuple[np.ndarray, Tuple[float, float]]:
+        image = decode_presized(data, content_type, width, height)
+        # Ultralytics expects numpy sources in OpenCV (BGR) channel order.
+        return np.ascontiguousarray(image[:, :, ::-1]), (1.0, 1.0)
+
+    out = await _predict_coalesced(
+        ("raw", content_type, width, height),
+        data,
+        _decode,
+        conf=conf_v,
+        iou=iou_v,
+        imgsz=imgsz_v,
+        max_det=max_det_v,
+        lang=lang,
+    )
+    return JSONResponse(out)
+
+
+app.include_router(admin_router(_profiler, ADMIN_TOKEN, PROFILE_MAX_SECONDS))
@@ -0,0 +1,42 @@
+import io
+
+from PIL import Image
+
+from uploads import decode_image_for_imgsz
+
+ORIENTATION_TAG = 0x0112
+
+
+def _jpeg(width: int, height: int, orientation: int = 1) -> bytes:
+    img = Image.new("RGB", (width, height), (255, 0, 0))
+    # Mark the left half so the rotation can be checked on the decoded pixels.
+    img.paste((0, 0, 255), (0, 0, width // 2, height))
+    exif = Image.Exif()
+    exif[ORIENTATION_TAG] = orientation
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", exif=exif.tobytes())
+    return buf.getvalue()
+
+
+def test_downscales_to_imgsz():
+    image, scale = decode_image_for_imgsz(_jpeg(400, 200), 100, 10**8)
+    assert image.shape == (50, 100, 3)
+    assert scale == (4.0, 4.0)
+
+
+def test_applies_exif_orientation():
+    # Orientation 6: stored landscape, displayed rotated 90 degrees clockwise (portrait).
+    image, scale = decode_image_for_imgsz(_jpeg(400, 200, orientation=6), 100, 10**8)
+    assert image.shape == (100, 50, 3)
+    # Boxes map back to the displayed 200x400 frame.
+    assert scale == (4.0, 4.0)
+    # The stored left half (blue) ends up on top after the rotation; BGR order -> blue is channel 0.
+    assert image[5, 25, 0] > 200 and image[5, 25, 2] < 50
+    assert image[95, 25, 2] > 200
+
+
+def test_scale_is_per_axis():
+    # 301x100 -> thumbnail rounds to 100x33: x and y factors differ.
+    _, (scale_x, scale_y) = decode_image_for_imgsz(_jpeg(301, 100), 100, 10**8)
+    assert scale_x == 301 / 100
+    assert scale_y == 100 / 33
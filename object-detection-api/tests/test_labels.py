@@ -0,0 +1,29 @@
+import json
+
+import pytest
+
+from labels import load_labels_pt
+
+
+def test_missing_file_returns_none(tmp_path):
+    assert load_labels_pt(tmp_path / "labels_pt.json", ["person"]) is None
+
+
+def test_missing_classes_are_logged_and_left_out(tmp_path, caplog):
+    path = tmp_path / "labels_pt.json"
+    path.write_text(json.dumps({"translations": {"person": "pessoa"}}), encoding="utf-8")
+
+    table = load_labels_pt(path, ["person", "traffic_light"])
+
+    assert table == {"person": "pessoa"}
+    # The API answers class_pt=null for classes without a translation.
+    assert table.get("traffic_light") is None
+    assert "traffic_light" in caplog.text
+
+
+def test_invalid_format(tmp_path):
+    path = tmp_path / "labels_pt.json"
+    path.write_text(json.dumps({"translations": ["pessoa"]}), encoding="utf-8")
+
+    with pytest.raises(RuntimeError):
+        load_labels_pt(path, ["person"])
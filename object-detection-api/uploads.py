@@ -0,0 +1,47 @@
+from typing import Tuple
+
+import numpy as np
+from fastapi import HTTPException
+from PIL import ImageOps
+
+# Generic upload/body helpers live in vision_common; re-exported so callers keep importing from here.
+from vision_common.uploads import (  # noqa: F401
+    PRESIZED_IMAGE_CONTENT_TYPES,
+    RAW_CONTENT_TYPES,
+    RequestSizeLimitMiddleware,
+    decode_presized,
+    open_image_checked,
+    read_body_limited,
+    read_upload_limited,
+)
+
+ORIENTATION_TAG = 0x0112
+
+
+def decode_image_for_imgsz(data: bytes, imgsz: int, max_pixels: int) -> Tuple[np.ndarray, Tuple[float, float]]:
+    """Decodes to a BGR uint8 array whose longest side is at most imgsz.
+
+    YOLO letterboxes to imgsz anyway, so nothing above that size is ever used. thumbnail()
+    lets libjpeg decode JPEGs at a reduced scale instead of materializing the full bitmap.
+    Also returns the (x, y) factors that map coordinates back to the original image, in its
+    EXIF-oriented frame.
+    """
+    img = open_image_checked(data, max_pixels)
+    orig_width, orig_height = img.size
+    # Orientations 5-8 rotate by 90 degrees: the displayed image has width and height swapped.
+    if img.getexif().get(ORIENTATION_TAG, 1) in (5, 6, 7, 8):
+        orig_width, orig_height = orig_height, orig_width
+    try:
+        if img.format != "JPEG":
+            # Only JPEG has a reduced-scale decode path; convert first so palette/alpha
+            # images are resampled in RGB rather than with nearest-neighbour.
+            img = img.convert("RGB")
+        img.thumbnail((imgsz, imgsz))
+        # OpenCV (which ultralytics reads files with) applies the EXIF orientation; Pillow does not.
+        img = ImageOps.exif_transpose(img)
+        img = img.convert("RGB")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail="Falha ao decodificar imagem") from e
+    # Ultralytics expects numpy sources in OpenCV (BGR) channel order.
+    image = np.ascontiguousarray(np.asarray(img, dtype=np.uint8)[:, :, ::-1])
+    return image, (orig_width / float(img.width), orig_height / float(img.height))
@@ -0,0 +1,6 @@
+# Vendored copy of vision_common/__init__.py; edit the original and run scripts/sync_vision_common.py.
+"""Helpers shared by caption-api and object-detection-api.
+
+Each service builds from its own directory, so it carries a vendored copy of this package
+(see scripts/sync_vision_common.py).
+"""
@@ -0,0 +1,62 @@
+# Vendored copy of vision_common/singleflight.py; edit the original and run scripts/sync_vision_common.py.
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    def __init__(self, task: "asyncio.Task[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces identical in-flight computations (same key) into a single execution.
+
+    The first request for a key starts the computation as its own task; later requests
+    with the same key await that task instead of starting another one. A requester that
+    disconnects (its handler is cancelled) only stops waiting. The computation is never
+    cancelled: it usually runs in a worker thread that cannot be interrupted anyway. The
+    key stays registered until it finishes, so a client that timed out and retries joins
+    the running computation instead of starting a second one.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+        # Computations whose requesters all went away; they keep running for a possible retry.
+        self.orphaned = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task, key=key, call=call: self._finished(key, call))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            # shield: cancelling this waiter must not cancel the shared computation.
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                self.orphaned += 1
+
+    def _finished(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Nobody may be awaiting an orphaned call: retrieve its error so asyncio does not log it.
+        if not call.task.cancelled():
+            call.task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._calls),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "orphaned": self.orphaned,
+        }
@@ -0,0 +1,164 @@
+# Vendored copy of vision_common/uploads.py; edit the original and run scripts/sync_vision_common.py.
+import io
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from fastapi import HTTPException, Request, UploadFile
+from PIL import Image
+
+# We enforce our own pixel limit before decoding; disable Pillow's global warning/limit.
+Image.MAX_IMAGE_PIXELS = None
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class RequestTooLarge(HTTPException):
+    def __init__(self, max_bytes: int):
+        super().__init__(status_code=413, detail=f"Requisição excede o limite de {max_bytes} bytes")
+
+
+class RequestSizeLimitMiddleware:
+    """Pure ASGI middleware capping the request body at max_bytes.
+
+    A declared Content-Length above the limit is rejected before anything is read. Bodies
+    without it (Transfer-Encoding: chunked) are counted as they are received and aborted as
+    soon as they pass the limit, before the JSON/multipart parsers buffer or spool them.
+    """
+
+    def __init__(self, app: Any, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive() -> Dict[str, Any]:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # An HTTPException, so FastAPI's body parsing re-raises it as a 413 instead of a 400.
+                    raise RequestTooLarge(self.max_bytes)
+            return message
+
+        async def tracking_send(message: Dict[str, Any]) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except RequestTooLarge:
+            # Raised outside a route's exception handling (e.g. swallowed and re-raised by a handler).
+            if response_started:
+                raise
+            await self._reject(send)
+
+    async def _reject(self, send: Callable) -> None:
+        body = json.dumps({"detail": f"Requisição excede o limite de {self.max_bytes} bytes"}).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                    (b"connection", b"close"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+async def read_upload_limited(file: UploadFile, max_bytes: int) -> bytes:
+    # Read in chunks so an oversized upload is rejected without ever being held in memory.
+    chunks: List[bytes] = []
+    total = 0
+    while True:
+        chunk = await file.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Arquivo excede o limite de {max_bytes} bytes")
+        chunks.append(chunk)
+    if not total:
+        raise HTTPException(status_code=400, detail="Arquivo vazio")
+    return b"".join(chunks)
+
+
+def open_image_checked(data: bytes, max_pixels: int) -> Image.Image:
+    # Image.open only parses the header, so width/height are known before any pixel is decoded.
+    try:
+        img = Image.open(io.BytesIO(data))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail="Formato de imagem não suportado") from e
+    width, height = img.size
+    if width <= 0 or height <= 0:
+        raise HTTPException(status_code=400, detail="Dimensões de imagem inválidas")
+    if width * height > max_pixels:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Imagem {width}x{height} excede o limite de {max_pixels} pixels",
+        )
+    return img
+
+
+# Pre-sized input (see /capabilities): raw RGB pixels, or a small JPEG at exactly the model size.
+RAW_CONTENT_TYPES = ("application/octet-stream", "application/x-rgb")
+PRESIZED_IMAGE_CONTENT_TYPES = ("image/jpeg",)
+
+
+async def read_body_limited(request: Request, max_bytes: int) -> bytes:
+    # Same as read_upload_limited, for a raw (non-multipart) request body.
+    chunks: List[bytes] = []
+    total = 0
+    async for chunk in request.stream():
+        total += len(chunk)
+        if total > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Requisição excede o limite de {max_bytes} bytes")
+        chunks.append(chunk)
+    if not total:
+        raise HTTPException(status_code=400, detail="Corpo da requisição vazio")
+    return b"".join(chunks)
+
+
+def decode_presized(data: bytes, content_type: Optional[str], width: int, height: int) -> np.ndarray:
+    """Returns the (height, width, 3) uint8 RGB array sent by the client, without any resize."""
+    ct = (content_type or "").split(";")[0].strip().lower()
+    if ct in RAW_CONTENT_TYPES:
+        expected = width * height * 3
+        if len(data) != expected:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Buffer com {len(data)} bytes; esperado {expected} ({width}x{height} RGB uint8)",
+            )
+        return np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+    if ct in PRESIZED_IMAGE_CONTENT_TYPES:
+        img = open_image_checked(data, width * height)
+        if img.size != (width, height):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Imagem {img.width}x{img.height} difere das dimensões informadas {width}x{height}",
+            )
+        try:
+            return np.asarray(img.convert("RGB"), dtype=np.uint8)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail="Falha ao decodificar imagem") from e
+    raise HTTPException(
+        status_code=415,
+        detail=f"Content-Type não suportado: {content_type}. Use {', '.join(RAW_CONTENT_TYPES + PRESIZED_IMAGE_CONTENT_TYPES)}",
+    )
@@ -0,0 +1,70 @@
+"""Copy vision_common/ into each service directory.
+
+Each API is built (Docker, Hugging Face Spaces) from its own directory alone, so it
+carries a vendored copy of the shared package. Edit the top-level vision_common/ only
+and run:
+
+    python scripts/sync_vision_common.py           # refresh the copies
+    python scripts/sync_vision_common.py --check   # exit 1 if a copy is stale (the tests run this)
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+SOURCE = ROOT / "vision_common"
+SERVICES = ("caption-api", "object-detection-api")
+HEADER = "# Vendored copy of vision_common/{name}; edit the original and run scripts/sync_vision_common.py.\n"
+
+
+def expected_files() -> Dict[str, str]:
+    return {
+        path.name: HEADER.format(name=path.name) + path.read_text(encoding="utf-8")
+        for path in sorted(SOURCE.glob("*.py"))
+    }
+
+
+def stale_files() -> List[Path]:
+    expected = expected_files()
+    stale = []
+    for service in SERVICES:
+        target = ROOT / service / "vision_common"
+        for name, content in expected.items():
+            path = target / name
+            if not path.exists() or path.read_text(encoding="utf-8") != content:
+                stale.append(path)
+        for path in sorted(target.glob("*.py")):
+            if path.name not in expected:
+                stale.append(path)
+    return stale
+
+
+def sync() -> None:
+    expected = expected_files()
+    for service in SERVICES:
+        target = ROOT / service / "vision_common"
+        target.mkdir(exist_ok=True)
+        for path in target.glob("*.py"):
+            if path.name not in expected:
+                path.unlink()
+        for name, content in expected.items():
+            (target / name).write_text(content, encoding="utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Copia vision_common/ para cada serviço")
+    parser.add_argument("--check", action="store_true", help="Só verifica se as cópias estão atualizadas")
+    args = parser.parse_args()
+
+    if args.check:
+        stale = stale_files()
+        for path in stale:
+            print(f"Cópia desatualizada: {path.relative_to(ROOT)}", file=sys.stderr)
+        sys.exit(1 if stale else 0)
+    sync()
+
+
+if __name__ == "__main__":
+    main()
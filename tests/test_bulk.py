@@ -0,0 +1,78 @@
+import json
+
+import argparse
+import logging
+
+from vision_common.bulk import add_bulk_arguments, iter_batches, load_checkpoint, pending_paths, run_bulk
+
+
+def _write(path, records, tail=""):
+    path.write_text("".join(json.dumps(r) + "\n" for r in records) + tail, encoding="utf-8")
+
+
+def test_load_checkpoint_drops_partial_last_line(tmp_path):
+    out = tmp_path / "out.ndjson"
+    _write(out, [{"path": "a.jpg", "caption": "x"}], tail='{"path": "b.jp')
+
+    assert load_checkpoint(str(out), retry_errors=False) == {"a.jpg"}
+    assert out.read_text(encoding="utf-8").endswith("\n")
+
+
+def test_retry_errors_removes_superseded_error_lines(tmp_path):
+    out = tmp_path / "out.ndjson"
+    _write(out, [{"path": "a.jpg", "caption": "x"}, {"path": "b.jpg", "error": "boom"}])
+
+    assert load_checkpoint(str(out), retry_errors=True) == {"a.jpg"}
+    # Appending the retried record must leave exactly one line per path.
+    with open(out, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"path": "b.jpg", "caption": "y"}) + "\n")
+    paths = [json.loads(line)["path"] for line in out.read_text(encoding="utf-8").splitlines()]
+    assert sorted(paths) == ["a.jpg", "b.jpg"]
+
+
+def test_errors_kept_without_retry(tmp_path):
+    out = tmp_path / "out.ndjson"
+    _write(out, [{"path": "b.jpg", "error": "boom"}])
+
+    assert load_checkpoint(str(out), retry_errors=False) == {"b.jpg"}
+    assert "boom" in out.read_text(encoding="utf-8")
+
+
+def test_iter_batches():
+    assert [len(b) for b in iter_batches(({"i": i} for i in range(5)), 2)] == [2, 2, 1]
+
+
+def _size_worker(path, max_bytes, max_pixels):
+    # Module-level so the spawned decode processes can unpickle it.
+    data = open(path, "rb").read()
+    if len(data) > max_bytes:
+        return {"path": path, "error": "grande demais"}
+    return {"path": path, "sha256": "x", "image": len(data)}
+
+
+def test_run_bulk_writes_one_record_per_path_and_resumes(tmp_path):
+    for name, size in [("a.jpg", 1), ("b.jpg", 50), ("c.jpg", 2)]:
+        (tmp_path / name).write_bytes(b"0" * size)
+    out = tmp_path / "out.ndjson"
+    parser = argparse.ArgumentParser()
+    add_bulk_arguments(parser, "TEST")
+    argv = [str(tmp_path), "--output", str(out), "--batch-size", "2", "--workers", "1", "--max-bytes", "10"]
+    logger = logging.getLogger("test_bulk")
+    batches = []
+
+    def infer(items):
+        batches.append(len(items))
+        return [{"size": item["image"]} for item in items]
+
+    args = parser.parse_args(argv)
+    run_bulk(pending_paths(args, logger), args, worker=_size_worker, worker_kwargs={}, infer=infer, logger=logger)
+
+    records = {r["path"].rsplit("/", 1)[-1]: r for r in map(json.loads, out.read_text(encoding="utf-8").splitlines())}
+    assert records["a.jpg"]["size"] == 1
+    assert records["b.jpg"] == {"path": str(tmp_path / "b.jpg"), "error": "grande demais"}
+    assert records["c.jpg"]["size"] == 2
+    # Failed items never reach infer.
+    assert sum(batches) == 2
+
+    args = parser.parse_args(argv + ["--resume"])
+    assert pending_paths(args, logger) == []
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+
+from vision_common.health import HealthMonitor
+
+
+def _run(monitor, until):
+    async def main():
+        monitor.start()
+        for _ in range(500):
+            if until():
+                break
+            await asyncio.sleep(0.01)
+        monitor.stop()
+
+    asyncio.run(main())
+
+
+def test_starting_until_load_and_warm_up_finish():
+    warm_up_started = threading.Event()
+    release = threading.Event()
+    seen = []
+
+    def warm_up():
+        warm_up_started.set()
+        release.wait(5)
+
+    monitor = HealthMonitor(load=lambda: None, warm_up=warm_up, build_snapshot=lambda: {"x": 1}, refresh_seconds=0.01)
+    assert monitor.snapshot["status"] == "starting"
+
+    def until():
+        if warm_up_started.is_set() and not release.is_set():
+            # Loaded but still warming up: not ready yet.
+            seen.append((monitor.snapshot["status"], monitor.ready_response().status_code))
+            release.set()
+        return monitor.snapshot["status"] == "ok"
+
+    _run(monitor, until)
+
+    assert seen == [("starting", 503)]
+    assert monitor.snapshot["status"] == "ok"
+    assert monitor.snapshot["x"] == 1
+    assert monitor.ready_response().status_code == 200
+
+
+def test_load_failure_reports_error():
+    def load():
+        raise RuntimeError("pesos ausentes")
+
+    warmed = []
+    monitor = HealthMonitor(load=load, warm_up=lambda: warmed.append(1), build_snapshot=dict, refresh_seconds=0.01)
+    _run(monitor, lambda: monitor.snapshot["status"] == "error")
+
+    assert warmed == []
+    assert monitor.snapshot["status"] == "error"
+    assert monitor.snapshot["error"] == "pesos ausentes"
+    assert monitor.ready_response().status_code == 503
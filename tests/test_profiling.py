@@ -0,0 +1,129 @@
+import contextlib
+import json
+import os
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from vision_common.profiling import Profiler, TorchTraceBackend, admin_router
+
+
+class StubBackend:
+    name = "stub"
+
+    def start(self, session_dir):
+        pass
+
+    def record(self):
+        return contextlib.nullcontext()
+
+    def stop(self, session_dir):
+        return []
+
+
+def _wait_done(profiler, session_id, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        session = profiler.get(session_id)
+        if session.status in ("done", "error"):
+            return session
+        time.sleep(0.01)
+    raise AssertionError("sessão de profiling não terminou")
+
+
+def _in_thread(fn):
+    result = {}
+    t = threading.Thread(target=lambda: result.setdefault("value", fn()))
+    t.start()
+    t.join()
+    return result.get("value")
+
+
+def test_session_stops_after_n_requests():
+    profiler = Profiler(StubBackend())
+    session = profiler.start(max_requests=2, max_seconds=30)
+
+    profiler.request_finished()
+    assert profiler.active
+    profiler.request_finished()
+
+    session = _wait_done(profiler, session.id)
+    assert session.stop_reason == "requests"
+    assert session.requests == 2
+    assert "python_profile.speedscope.json" in session.artifacts
+
+    profiler.start(max_requests=None, max_seconds=30)
+    with pytest.raises(RuntimeError):
+        profiler.start(max_requests=None, max_seconds=30)
+    assert profiler.stop().stop_reason == "manual"
+
+
+def test_idle_profiler_is_noop():
+    profiler = Profiler(StubBackend())
+    profiler.request_finished()
+    with profiler.trace():
+        pass
+    assert profiler.status()["sessions"] == []
+
+
+def test_torch_trace_records_ops_from_other_threads():
+    torch = pytest.importorskip("torch")
+    profiler = Profiler(TorchTraceBackend())
+
+    # Like the API: start, inference and stop each run on a different thread.
+    session = _in_thread(lambda: profiler.start(max_requests=1, max_seconds=30))
+
+    def inference():
+        with profiler.trace():
+            torch.mm(torch.randn(32, 32), torch.randn(32, 32))
+        profiler.request_finished()
+
+    _in_thread(inference)
+    session = _wait_done(profiler, session.id)
+
+    assert session.status == "done", session.error
+    assert "torch_trace.json" in session.artifacts
+    with open(os.path.join(session.dir, "torch_trace.json"), encoding="utf-8") as f:
+        trace = json.load(f)
+    assert any(e.get("name") == "aten::mm" for e in trace["traceEvents"])
+    # Per-inference parts are merged and removed.
+    assert not [name for name in os.listdir(session.dir) if ".part" in name]
+
+    # The next session works too (no profiler left enabled on a worker thread).
+    session = _in_thread(lambda: profiler.start(max_requests=None, max_seconds=30))
+    _in_thread(inference)
+    assert _in_thread(profiler.stop).status == "done"
+
+
+def _admin_client(token):
+    profiler = Profiler(StubBackend())
+    app = FastAPI()
+    app.include_router(admin_router(profiler, token, max_seconds=60))
+    return TestClient(app)
+
+
+def test_admin_routes_hidden_without_token():
+    client = _admin_client(None)
+    assert client.get("/admin/profile", headers={"X-Admin-Token": "x"}).status_code == 404
+
+
+def test_admin_routes_require_token_and_run_session():
+    client = _admin_client("segredo")
+    assert client.get("/admin/profile").status_code == 403
+    assert client.get("/admin/profile", headers={"X-Admin-Token": "errado"}).status_code == 403
+
+    headers = {"X-Admin-Token": "segredo"}
+    assert client.post("/admin/profile?seconds=120", headers=headers).status_code == 422
+    started = client.post("/admin/profile?requests=0&seconds=30", headers=headers).json()
+    assert client.post("/admin/profile", headers=headers).status_code == 409
+
+    stopped = client.post("/admin/profile/stop", headers=headers).json()
+    assert stopped["id"] == started["id"] and stopped["status"] == "done"
+    assert client.post("/admin/profile/stop", headers=headers).status_code == 409
+
+    download = client.get(f"/admin/profile/{started['id']}/python_profile.speedscope.json", headers=headers)
+    assert download.status_code == 200 and download.json()["profiles"] is not None
+    assert client.get(f"/admin/profile/{started['id']}/nada.json", headers=headers).status_code == 404
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+
+import pytest
+
+from vision_common.singleflight import SingleFlight
+
+
+def test_identical_calls_share_one_execution():
+    async def scenario():
+        flight = SingleFlight()
+        runs = 0
+
+        async def work():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.01)
+            return "caption"
+
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+        return flight, runs, results
+
+    flight, runs, results = asyncio.run(scenario())
+    assert runs == 1
+    assert results == ["caption"] * 5
+    assert flight.stats() == {"in_flight": 0, "executions": 1, "coalesced": 4, "orphaned": 0}
+
+
+def test_cancelled_waiter_retry_joins_running_call():
+    async def scenario():
+        flight = SingleFlight()
+        release = threading.Event()
+        runs = 0
+
+        def blocking():
+            # Stands in for greedy_caption/predict in a worker thread: it cannot be cancelled.
+            nonlocal runs
+            runs += 1
+            release.wait(5)
+            return "result"
+
+        loop = asyncio.get_running_loop()
+        work = lambda: loop.run_in_executor(None, blocking)  # noqa: E731
+
+        first = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()  # the client timed out and disconnected
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert flight.stats()["in_flight"] == 1
+
+        retry = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        release.set()
+        return flight, runs, await retry
+
+    flight, runs, result = asyncio.run(scenario())
+    assert result == "result"
+    assert runs == 1
+    assert flight.stats() == {"in_flight": 0, "executions": 1, "coalesced": 1, "orphaned": 1}
+
+
+def test_errors_propagate_and_key_is_released():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def failing():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            await flight.do("k", failing)
+        return flight
+
+    assert asyncio.run(scenario()).stats()["in_flight"] == 0
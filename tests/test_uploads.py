@@ -0,0 +1,134 @@
+import asyncio
+import io
+
+import numpy as np
+import pytest
+from fastapi import FastAPI, File, HTTPException, Request, UploadFile
+from fastapi.testclient import TestClient
+from PIL import Image
+from pydantic import BaseModel
+
+from vision_common.uploads import (
+    RequestSizeLimitMiddleware,
+    decode_presized,
+    open_image_checked,
+    read_upload_limited,
+)
+
+LIMIT = 1024
+
+
+class Payload(BaseModel):
+    image_base64: str
+
+
+def _make_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestSizeLimitMiddleware, max_bytes=LIMIT)
+
+    @app.post("/json")
+    async def json_endpoint(payload: Payload):
+        return {"chars": len(payload.image_base64)}
+
+    @app.post("/upload")
+    async def upload_endpoint(file: UploadFile = File(...)):
+        return {"bytes": len(await file.read())}
+
+    @app.post("/raw")
+    async def raw_endpoint(request: Request):
+        return {"bytes": len(await request.body())}
+
+    return app
+
+
+def _chunks(data: bytes, size: int = 100):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+@pytest.fixture
+def client():
+    return TestClient(_make_app())
+
+
+def test_declared_content_length_over_limit(client):
+    resp = client.post("/raw", content=b"x" * (LIMIT + 1))
+    assert resp.status_code == 413
+
+
+def test_chunked_body_over_limit(client):
+    # A generator body is sent without Content-Length (Transfer-Encoding: chunked).
+    resp = client.post("/raw", content=_chunks(b"x" * (LIMIT * 4)))
+    assert resp.status_code == 413
+
+
+def test_chunked_json_over_limit_is_413_not_400(client):
+    body = b'{"image_base64": "' + b"A" * (LIMIT * 4) + b'"}'
+    resp = client.post("/json", content=_chunks(body), headers={"content-type": "application/json"})
+    assert resp.status_code == 413
+
+
+def test_chunked_multipart_over_limit(client):
+    boundary = "xyz"
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="a.jpg"\r\n'
+        f"Content-Type: image/jpeg\r\n\r\n"
+    ).encode() + b"x" * (LIMIT * 4) + f"\r\n--{boundary}--\r\n".encode()
+    resp = client.post(
+        "/upload",
+        content=_chunks(body),
+        headers={"content-type": f"multipart/form-data; boundary={boundary}"},
+    )
+    assert resp.status_code == 413
+
+
+def test_chunked_body_under_limit(client):
+    resp = client.post("/raw", content=_chunks(b"x" * (LIMIT // 2)))
+    assert resp.status_code == 200
+    assert resp.json() == {"bytes": LIMIT // 2}
+
+
+class _FakeUpload:
+    def __init__(self, data: bytes):
+        self._buf = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._buf.read(size)
+
+
+def test_read_upload_limited():
+    assert asyncio.run(read_upload_limited(_FakeUpload(b"abc"), 3)) == b"abc"
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(read_upload_limited(_FakeUpload(b"abcd"), 3))
+    assert exc.value.status_code == 413
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(read_upload_limited(_FakeUpload(b""), 3))
+    assert exc.value.status_code == 400
+
+
+def _jpeg(width: int, height: int) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (10, 20, 30)).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+def test_open_image_checked_pixel_limit():
+    data = _jpeg(100, 50)
+    assert open_image_checked(data, 5000).size == (100, 50)
+    with pytest.raises(HTTPException) as exc:
+        open_image_checked(data, 4999)
+    assert exc.value.status_code == 413
+    with pytest.raises(HTTPException) as exc:
+        open_image_checked(b"not an image", 5000)
+    assert exc.value.status_code == 400
+
+
+def test_decode_presized():
+    raw = np.arange(4 * 2 * 3, dtype=np.uint8).tobytes()
+    assert decode_presized(raw, "application/octet-stream", 4, 2).shape == (2, 4, 3)
+    with pytest.raises(HTTPException):
+        decode_presized(raw[:-1], "application/octet-stream", 4, 2)
+    assert decode_presized(_jpeg(4, 2), "image/jpeg", 4, 2).shape == (2, 4, 3)
+    with pytest.raises(HTTPException) as exc:
+        decode_presized(raw, "image/png", 4, 2)
+    assert exc.value.status_code == 415
@@ -0,0 +1,14 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_vendored_vision_common_is_in_sync():
+    result = subprocess.run(
+        [sys.executable, str(ROOT / "scripts" / "sync_vision_common.py"), "--check"],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr + "\nRode: python scripts/sync_vision_common.py"
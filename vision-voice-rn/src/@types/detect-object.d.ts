@@ -1,4 +1,6 @@
 type DetectedObject = {
   class: string
   confidence?: number
+  // pt-BR class name from the API table, when available
+  class_pt?: string | null
 }
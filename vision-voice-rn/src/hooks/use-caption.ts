@@ -27,7 +27,9 @@ export function useCaption(): UseCaptionResult {
     setResult('')
 
     try {
-      const caption = await getCaptionService({ uri: currentUri })
+      const { caption, captionPt } = await getCaptionService({
+        uri: currentUri,
+      })
       if (requestId !== requestIdRef.current) return
 
       if (!caption) {
@@ -35,7 +37,8 @@ export function useCaption(): UseCaptionResult {
         return ''
       }
 
-      const translated = await translateText({ text: caption })
+      // Only call the translation API when the server did not translate.
+      const translated = captionPt || (await translateText({ text: caption }))
       if (requestId !== requestIdRef.current) return
       setResult(translated)
       return translated
@@ -33,6 +33,7 @@ export function useDetection(): UseDetectionResult {
       const translatedObjects = await Promise.all(
         objects.map(async (obj: DetectedObject) => {
           if (!obj.class) return obj
+          if (obj.class_pt) return { ...obj, class: obj.class_pt }
           try {
             const translatedClass = await translateText({ text: obj.class })
             return {
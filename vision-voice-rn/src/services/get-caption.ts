@@ -4,10 +4,16 @@ type GetCaptionParams = {
   uri: string
 }
 
+type GetCaptionResult = {
+  caption: string
+  // Translated by the API when it has translation enabled; null otherwise.
+  captionPt: string | null
+}
+
 export const getCaption = async ({
   uri,
-}: GetCaptionParams): Promise<string> => {
-  if (!uri) return ''
+}: GetCaptionParams): Promise<GetCaptionResult> => {
+  if (!uri) return { caption: '', captionPt: null }
 
   const captionApi = api({ isCaption: true })
 
@@ -22,8 +28,12 @@ export const getCaption = async ({
   } as unknown as Blob)
 
   const response = await captionApi.post('', formData, {
+    params: { lang: 'pt-BR' },
     headers: { 'Content-Type': 'multipart/form-data' },
   })
 
-  return response.data?.caption ?? ''
+  return {
+    caption: response.data?.caption ?? '',
+    captionPt: response.data?.caption_pt ?? null,
+  }
 }
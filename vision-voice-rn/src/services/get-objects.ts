@@ -20,6 +20,7 @@ export const getObjects = async ({ uri }: GetObjectsParams) => {
   } as unknown as Blob)
 
   const response = await objectsApi.post('', formData, {
+    params: { lang: 'pt-BR' },
     headers: { 'Content-Type': 'multipart/form-data' },
   })
 
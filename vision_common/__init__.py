@@ -0,0 +1,5 @@
+"""Helpers shared by caption-api and object-detection-api.
+
+Each service builds from its own directory, so it carries a vendored copy of this package
+(see scripts/sync_vision_common.py).
+"""
@@ -0,0 +1,88 @@
+"""Background model loading, warm-up and the cached /health snapshot of both APIs."""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """Loads and warms up the model off the event loop and keeps a /health snapshot fresh.
+
+    status is "starting" until load() and warm_up() have both finished, then "ok", or
+    "error" if either raised. Probes are answered from the snapshot, so they never wait on
+    the model; build_snapshot() supplies the service-specific fields.
+    """
+
+    def __init__(
+        self,
+        *,
+        load: Callable[[], None],
+        warm_up: Callable[[], None],
+        build_snapshot: Callable[[], Dict[str, Any]],
+        refresh_seconds: float,
+    ):
+        self._load = load
+        self._warm_up = warm_up
+        self._build_snapshot = build_snapshot
+        self.refresh_seconds = refresh_seconds
+        self.ready = False
+        self.error: Optional[str] = None
+        self.snapshot: Dict[str, Any] = {"status": "starting", "ready": False, "error": None}
+        self._tasks: List[Any] = []
+
+    @property
+    def status(self) -> str:
+        if self.ready:
+            return "ok"
+        return "error" if self.error is not None else "starting"
+
+    def start(self) -> None:
+        """Call from the app's startup event: the liveness probe answers while this runs."""
+        loop = asyncio.get_running_loop()
+        self._tasks.append(loop.run_in_executor(None, self._load_and_warm_up))
+        self._tasks.append(asyncio.create_task(self._refresh_loop()))
+
+    def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+
+    def _load_and_warm_up(self) -> None:
+        t0 = time.time()
+        try:
+            self._load()
+            # Publish "model loaded" while the warm-up still runs.
+            self.refresh()
+            self._warm_up()
+            self.ready = True
+            logger.info("Modelo pronto em %.0f ms", (time.time() - t0) * 1000.0)
+        except Exception as e:
+            self.error = str(e)
+            logger.exception("Falha ao carregar o modelo ou no warm-up: %s", e)
+        # Publish the new state right away instead of waiting for the next refresh.
+        self.refresh()
+
+    def refresh(self) -> None:
+        try:
+            self.snapshot = {
+                "status": self.status,
+                "ready": self.ready,
+                "error": self.error,
+                **self._build_snapshot(),
+                "updated_at": time.time(),
+            }
+        except Exception as e:
+            logger.warning("Falha ao atualizar snapshot de health: %s", e)
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            self.refresh()
+            await asyncio.sleep(self.refresh_seconds)
+
+    def ready_response(self) -> JSONResponse:
+        body = {"ready": self.ready, "error": self.error}
+        return JSONResponse(body, status_code=200 if self.ready else 503)
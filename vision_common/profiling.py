@@ -0,0 +1,373 @@
+import contextlib
+import hmac
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+
+
+class StackSampler:
+    """Python sampling profiler: snapshots every thread's stack at a fixed interval.
+
+    Output is a speedscope "sampled" profile (one profile per thread), viewable at
+    https://www.speedscope.app.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._frames: List[Dict[str, Any]] = []
+        self._frame_ids: Dict[Tuple[str, str, int], int] = {}
+        self._samples: Dict[int, List[Tuple[Tuple[int, ...], float]]] = {}
+        self._thread_names: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = 0.0
+        self._stopped_at = 0.0
+
+    def start(self) -> None:
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._stopped_at = time.perf_counter()
+        self._thread_names.update({t.ident: t.name for t in threading.enumerate() if t.ident is not None})
+
+    def _frame_id(self, name: str, filename: str, line: int) -> int:
+        key = (name, filename, line)
+        idx = self._frame_ids.get(key)
+        if idx is None:
+            idx = len(self._frames)
+            self._frame_ids[key] = idx
+            self._frames.append({"name": name, "file": filename, "line": line})
+        return idx
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight, last = now - last, now
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(self._frame_id(code.co_name, code.co_filename, code.co_firstlineno))
+                    frame = frame.f_back
+                stack.reverse()  # speedscope wants root -> leaf
+                self._samples.setdefault(thread_id, []).append((tuple(stack), weight))
+            # Threads that finish during the session would be missing from the names taken at stop().
+            self._thread_names.update({t.ident: t.name for t in threading.enumerate() if t.ident is not None})
+
+    def to_speedscope(self, name: str) -> Dict[str, Any]:
+        duration = self._stopped_at - self._started_at
+        profiles = []
+        for thread_id, samples in self._samples.items():
+            profiles.append(
+                {
+                    "type": "sampled",
+                    "name": f"{self._thread_names.get(thread_id, 'thread')} ({thread_id})",
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": duration,
+                    "samples": [list(stack) for stack, _ in samples],
+                    "weights": [weight for _, weight in samples],
+                }
+            )
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "vision_common profiling",
+            "shared": {"frames": self._frames},
+            "profiles": profiles,
+        }
+
+
+class TensorFlowTraceBackend:
+    """TensorFlow profiler trace (open the zip's logdir in TensorBoard's Profile tab)."""
+
+    name = "tensorflow"
+
+    def start(self, session_dir: str) -> None:
+        import tensorflow as tf
+
+        tf.profiler.experimental.start(os.path.join(session_dir, "tensorflow"))
+
+    def record(self) -> ContextManager[None]:
+        # The TensorFlow profiler traces every thread of the process; nothing to do per inference.
+        return contextlib.nullcontext()
+
+    def stop(self, session_dir: str) -> List[str]:
+        import tensorflow as tf
+
+        tf.profiler.experimental.stop()
+        logdir = os.path.join(session_dir, "tensorflow")
+        shutil.make_archive(os.path.join(session_dir, "tensorflow_trace"), "zip", logdir)
+        shutil.rmtree(logdir, ignore_errors=True)
+        return ["tensorflow_trace.zip"]
+
+
+class TorchTraceBackend:
+    """torch.profiler trace exported as Chrome trace JSON (chrome://tracing or Perfetto).
+
+    torch.profiler is local to the thread that starts it, and predict() runs on whichever
+    threadpool worker picked up the request. So instead of one profiler for the whole
+    session, record() profiles each inference on its own thread (see Profiler.trace) and
+    exports it to a part file as soon as it finishes; stop() merges the parts, which share
+    a time base, into one file. Only one inference's profile is held in memory at a time.
+    """
+
+    name = "torch"
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._session_dir: Optional[str] = None
+        self._parts: List[str] = []
+
+    def start(self, session_dir: str) -> None:
+        import torch  # noqa: F401  (fail the start request early if torch is missing)
+
+        with self._lock:
+            self._session_dir = session_dir
+            self._parts = []
+
+    @contextlib.contextmanager
+    def record(self) -> Iterator[None]:
+        import torch
+
+        activities = [torch.profiler.ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(torch.profiler.ProfilerActivity.CUDA)
+        with torch.profiler.profile(activities=activities, record_shapes=True) as prof:
+            yield
+        # Export under the lock so stop() never merges (or misses) a half-written part.
+        with self._lock:
+            if self._session_dir is not None:
+                part_path = os.path.join(self._session_dir, f"torch_trace.part{len(self._parts)}.json")
+                prof.export_chrome_trace(part_path)
+                self._parts.append(part_path)
+
+    def stop(self, session_dir: str) -> List[str]:
+        with self._lock:
+            parts, self._parts, self._session_dir = self._parts, [], None
+
+        # Stream the events into the merged file one part at a time.
+        metadata: Dict[str, Any] = {}
+        with open(os.path.join(session_dir, "torch_trace.json"), "w", encoding="utf-8") as out:
+            out.write('{"traceEvents": [')
+            first = True
+            for part_path in parts:
+                with open(part_path, "r", encoding="utf-8") as f:
+                    part = json.load(f)
+                os.remove(part_path)
+                for event in part.pop("traceEvents", []):
+                    out.write(("" if first else ",") + json.dumps(event))
+                    first = False
+                if not metadata:
+                    metadata = part  # schema/device metadata from the first inference
+            out.write("]")
+            for key, value in metadata.items():
+                out.write(f", {json.dumps(key)}: {json.dumps(value)}")
+            out.write("}")
+        return ["torch_trace.json"]
+
+
+@dataclass
+class ProfileSession:
+    id: str
+    dir: str
+    max_requests: Optional[int]
+    max_seconds: float
+    started_at: float
+    requests: int = 0
+    status: str = "running"
+    stop_reason: Optional[str] = None
+    stopped_at: Optional[float] = None
+    artifacts: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "max_requests": self.max_requests,
+            "max_seconds": self.max_seconds,
+            "requests": self.requests,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+            "stop_reason": self.stop_reason,
+            "artifacts": list(self.artifacts),
+            "error": self.error,
+        }
+
+
+class Profiler:
+    """On-demand profiling of live traffic for the next N requests or T seconds.
+
+    Handlers call request_finished() once per request (coalesced duplicates included), and
+    wrap each inference in trace(). When no session is running, both are a single attribute check.
+    """
+
+    def __init__(self, backend: Any, keep_sessions: int = 5):
+        self.backend = backend
+        self.keep_sessions = keep_sessions
+        self.active = False
+        self._lock = threading.Lock()
+        self._current: Optional[ProfileSession] = None
+        self._sampler: Optional[StackSampler] = None
+        self._timer: Optional[threading.Timer] = None
+        self._sessions: "OrderedDict[str, ProfileSession]" = OrderedDict()
+
+    def start(self, *, max_requests: Optional[int], max_seconds: float) -> ProfileSession:
+        with self._lock:
+            if self.active:
+                raise RuntimeError("Já existe uma sessão de profiling em andamento")
+            session = ProfileSession(
+                id=uuid.uuid4().hex[:12],
+                dir=tempfile.mkdtemp(prefix="profile-"),
+                max_requests=max_requests,
+                max_seconds=max_seconds,
+                started_at=time.time(),
+            )
+            self._sampler = StackSampler()
+            self._sampler.start()
+            try:
+                self.backend.start(session.dir)
+            except Exception:
+                self._sampler.stop()
+                shutil.rmtree(session.dir, ignore_errors=True)
+                raise
+            self._timer = threading.Timer(max_seconds, self.stop, kwargs={"reason": "timeout"})
+            self._timer.daemon = True
+            self._timer.start()
+            self._current = session
+            self._remember(session)
+            self.active = True
+            return session
+
+    def trace(self) -> ContextManager[None]:
+        """Wraps one inference, on the thread that runs it, while a session is active."""
+        if not self.active:
+            return contextlib.nullcontext()
+        return self.backend.record()
+
+    def request_finished(self) -> None:
+        if not self.active:
+            return
+        with self._lock:
+            session = self._current
+            if session is None:
+                return
+            session.requests += 1
+            done = session.max_requests is not None and session.requests >= session.max_requests
+        if done:
+            # Export in the background: the request that closes the session should not wait for it.
+            threading.Thread(target=self.stop, kwargs={"reason": "requests"}, daemon=True).start()
+
+    def stop(self, reason: str = "manual") -> Optional[ProfileSession]:
+        with self._lock:
+            if not self.active or self._current is None:
+                return None
+            session, sampler, timer = self._current, self._sampler, self._timer
+            self.active = False
+            self._current = None
+            session.status = "stopping"
+            session.stop_reason = reason
+        if timer is not None:
+            timer.cancel()
+
+        try:
+            assert sampler is not None
+            sampler.stop()
+            with open(os.path.join(session.dir, "python_profile.speedscope.json"), "w", encoding="utf-8") as f:
+                json.dump(sampler.to_speedscope(f"profile {session.id}"), f)
+            session.artifacts = ["python_profile.speedscope.json"]
+            session.artifacts += self.backend.stop(session.dir)
+            session.status = "done"
+        except Exception as e:
+            session.status = "error"
+            session.error = str(e)
+        session.stopped_at = time.time()
+        return session
+
+    def _remember(self, session: ProfileSession) -> None:
+        # Keep the last few sessions on disk for download; delete older ones.
+        self._sessions[session.id] = session
+        while len(self._sessions) > self.keep_sessions:
+            _, old = self._sessions.popitem(last=False)
+            shutil.rmtree(old.dir, ignore_errors=True)
+
+    def get(self, session_id: str) -> Optional[ProfileSession]:
+        return self._sessions.get(session_id)
+
+    def artifact_path(self, session_id: str, artifact: str) -> Optional[str]:
+        session = self._sessions.get(session_id)
+        if session is None or artifact not in session.artifacts:
+            return None
+        return os.path.join(session.dir, artifact)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "backend": self.backend.name,
+            "sessions": [s.to_dict() for s in reversed(self._sessions.values())],
+        }
+
+
+def admin_router(profiler: Profiler, token: Optional[str], max_seconds: float) -> APIRouter:
+    """/admin/profile endpoints; every route answers 404 unless an admin token is configured."""
+
+    def require_admin(x_admin_token: Optional[str] = Header(None, alias="X-Admin-Token")) -> None:
+        if not token:
+            raise HTTPException(status_code=404, detail="Not Found")
+        if not x_admin_token or not hmac.compare_digest(x_admin_token, token):
+            raise HTTPException(status_code=403, detail="Token de administração inválido")
+
+    router = APIRouter(prefix="/admin/profile", dependencies=[Depends(require_admin)])
+
+    @router.post("")
+    async def start_profile(
+        requests: int = Query(10, ge=0, description="Encerra após N requisições (0 = só pelo tempo)"),
+        seconds: float = Query(30.0, gt=0, le=max_seconds),
+    ) -> Dict[str, Any]:
+        try:
+            session = await run_in_threadpool(profiler.start, max_requests=requests or None, max_seconds=seconds)
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        return session.to_dict()
+
+    @router.post("/stop")
+    async def stop_profile() -> Dict[str, Any]:
+        session = await run_in_threadpool(profiler.stop)
+        if session is None:
+            raise HTTPException(status_code=409, detail="Nenhuma sessão de profiling em andamento")
+        return session.to_dict()
+
+    @router.get("")
+    async def profile_status() -> Dict[str, Any]:
+        return profiler.status()
+
+    @router.get("/{session_id}/{artifact}")
+    async def download_profile_artifact(session_id: str, artifact: str) -> FileResponse:
+        path = profiler.artifact_path(session_id, artifact)
+        if path is None:
+            raise HTTPException(status_code=404, detail="Artefato não encontrado")
+        return FileResponse(path, filename=f"{session_id}-{artifact}")
+
+    return router